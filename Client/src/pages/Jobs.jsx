@@ -9,6 +9,7 @@ import JobLoader from "../components/Jobs/JobLoader";
 
 const Jobs = () => {
   const [jobData, setJobData] = useState([]);
+  const [matchScores, setMatchScores] = useState(null);
   const [filters, setFilters] = useState({ location: "", domain: "", salary: "" });
   const [displayJobs, setDisplayJobs] = useState([]);
   const [page, setPage] = useState(1);
@@ -45,6 +46,33 @@ const Jobs = () => {
       .catch((err) => console.error("Error loading job data:", err));
   }, []);
 
+  // --- MATCH SCORES (skills of the last analysed resume, job index) ---
+  useEffect(() => {
+    const saved = JSON.parse(localStorage.getItem("resume_analysis_data") || "null");
+    if (!saved?.skills?.length) return;
+
+    fetch("/api/jobs/match", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ skills: saved.skills }),
+    })
+      .then((res) => (res.ok ? res.json() : Promise.reject(res.status)))
+      .then(({ matches }) => {
+        // "index" is the job's position in jobs.json (id - 1 here)
+        setMatchScores(new Map(matches.map((m) => [m.index + 1, m.ats_score])));
+      })
+      .catch((err) => console.error("Error loading match scores:", err));
+  }, []);
+
+  const scoredJobs = useMemo(
+    () =>
+      matchScores
+        ? // Jobs without a known skill are not in the index results: 0, as in ATS
+          jobData.map((job) => ({ ...job, match: matchScores.get(job.id) ?? 0 }))
+        : jobData,
+    [jobData, matchScores]
+  );
+
   const handleFilterChange = (e) => {
     setFilters({ ...filters, [e.target.name]: e.target.value });
     setPage(1);
@@ -59,7 +87,7 @@ const Jobs = () => {
   };
 
   const filteredJobs = useMemo(() => {
-    return jobData.filter((job) => {
+    return scoredJobs.filter((job) => {
       const salaryFilterMatch =
         filters.salary === "" ||
         (() => {
@@ -74,7 +102,7 @@ const Jobs = () => {
         salaryFilterMatch
       );
     });
-  }, [filters, jobData]);
+  }, [filters, scoredJobs]);
 
   const loadMoreJobs = useCallback(() => {
     const nextJobs = filteredJobs.slice(0, page * perPage);
@@ -0,0 +1,463 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import platform
+import functools
+import subprocess
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import parse_resume
+from resume_cache import NullCache
+from resume_dedup import NullIndex
+
+# ---------------------------------------------------
+# CONFIG
+# ---------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DOC_DIR = os.path.join(BASE_DIR, "..", "..", "Doc")
+RESULTS_DIR = os.path.join(BASE_DIR, "bench_results")
+
+STAGES = [
+    "read_pdf", "index_sections", "extract_name", "extract_skills",
+    "extract_experience", "extract_education", "parse_projects",
+    "llm_extract_resume", "calculate_ats_score",
+]
+
+JOB_DESCRIPTION = (
+    "Full stack developer with React, Node.js, Express, MongoDB and AWS. "
+    "Docker, Kubernetes and CI/CD experience preferred. Python is a plus."
+)
+
+LLM_RESPONSE = json.dumps({
+    "name": "Bench Candidate",
+    "email": "bench@example.com",
+    "phone": "",
+    "skills": ["python", "react"],
+    "experience_years": 1,
+    "education": [],
+    "projects": [{"title": "Bench", "description": "Stub", "tech_stack": []}],
+})
+
+# ---------------------------------------------------
+# MINIMAL PDF WRITER (synthetic corpus, no dependencies)
+# ---------------------------------------------------
+def _pdf_escape(line):
+    line = line.encode("latin-1", "replace").decode("latin-1")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path, pages):
+    # pages: list of pages, each a list of text lines (Helvetica 10pt)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for lines in pages:
+        ops = ["BT /F1 10 Tf 12 TL 40 760 Td"]
+        ops += [f"({_pdf_escape(l)}) Tj T*" for l in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, xref
+    )
+    with open(path, "wb") as f:
+        f.write(out)
+
+# ---------------------------------------------------
+# SYNTHETIC RESUMES
+# ---------------------------------------------------
+SKILL_WORDS = [
+    "Python", "React", "Node.js", "Express", "MongoDB", "Docker", "AWS",
+    "Kubernetes", "Java", "Spring Boot", "SQL", "Git", "Linux", "TensorFlow",
+]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+def _paginate(lines, per_page=60):
+    return [lines[i:i + per_page] for i in range(0, len(lines), per_page)] or [[]]
+
+def synthetic_resume(rng, roles=3, projects=3, filler_pages=0):
+    lines = ["Alex Morgan", "alex.morgan@gmail.com | +91 98765 43210", "SUMMARY",
+             "Software engineer building web platforms and data pipelines."]
+
+    lines.append("SKILLS")
+    lines.append(", ".join(rng.sample(SKILL_WORDS, 8)))
+
+    lines.append("EXPERIENCE")
+    for i in range(roles):
+        y = 2012 + i * 2
+        lines.append(
+            f"Engineer {i + 1}, Company {i + 1}  "
+            f"{rng.choice(MONTHS)} {y} - {rng.choice(MONTHS)} {y + 2}"
+        )
+        lines.append(f"- Built services with {rng.choice(SKILL_WORDS)}")
+
+    lines.append("PROJECTS")
+    for i in range(projects):
+        lines.append(f"{i + 1}) Project {i + 1}")
+        lines.append(f"Tech Stack: {', '.join(rng.sample(SKILL_WORDS, 3))}")
+        lines.append("Description: Internal tool used by several teams")
+
+    lines.append("EDUCATION")
+    lines.append("B.Tech Computer Engineering, University of Mumbai 2008-2012")
+
+    pages = _paginate(lines)
+    for p in range(filler_pages):
+        pages.append([f"Certificate {p + 1}: completed course in {w}" for w in SKILL_WORDS])
+    return pages
+
+def fresher_resume(rng):
+    # A graduate: internships without dates and no projects section, so
+    # 0 years and no projects are the right answers, not missing ones
+    lines = ["Priya Shah", "priya.shah@gmail.com | +91 91234 56780",
+             "CAREER OBJECTIVE",
+             "Graduate engineer keen to build web apps and open-source projects."]
+    lines.append("TECHNICAL SKILLS")
+    lines.append(", ".join(rng.sample(SKILL_WORDS, 6)))
+    lines.append("INTERNSHIPS")
+    lines.append("Web development intern, Company 1 (six weeks)")
+    lines.append(f"- Fixed bugs in a {rng.choice(SKILL_WORDS)} dashboard")
+    lines.append("EDUCATION")
+    lines.append("B.Tech Computer Engineering, University of Pune 2020-2024")
+    return _paginate(lines)
+
+def adversarial_resume(rng):
+    # OCR-like noise, no section headings for projects/experience, very long
+    # unbroken lines and a flood of date ranges
+    noise = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz .,;:-|/()") for _ in range(180))
+    lines = ["CURRICULUM VITAE", "nam e: j0hn d0e  em@il: jd@ex ample . com"]
+    lines += [noise for _ in range(40)]
+    lines += [f"{rng.choice(MONTHS)} 20{10 + i % 14} to {rng.choice(MONTHS)} 20{11 + i % 14}"
+              for i in range(120)]
+    lines += ["project " + noise for _ in range(40)]
+    return _paginate(lines)
+
+def build_synthetic_corpus(out_dir, seed=7):
+    rng = random.Random(seed)
+    corpus = {
+        "synthetic_one_page.pdf": synthetic_resume(rng),
+        "synthetic_dense.pdf": synthetic_resume(rng, roles=12, projects=15),
+        "synthetic_30_pages.pdf": synthetic_resume(rng, filler_pages=29),
+        "synthetic_fresher.pdf": fresher_resume(rng),
+        "adversarial_noise.pdf": adversarial_resume(rng),
+    }
+    paths = []
+    for name, pages in corpus.items():
+        path = os.path.join(out_dir, name)
+        write_pdf(path, pages)
+        paths.append(path)
+    return paths
+
+# ---------------------------------------------------
+# WORST-CASE TEXT (1 MB pathological inputs)
+# ---------------------------------------------------
+# These skip the PDF reader and go straight into the rule-based stages,
+# which is where a badly extracted PDF could pin a worker.
+WORST_CASE_BYTES = 1 << 20
+WORST_CASE_BUDGET_MS = 2000
+
+def worst_case_texts(rng, size=WORST_CASE_BYTES):
+    noise = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz .,;:-|/()\n") for _ in range(4096))
+    noise = (noise * (size // len(noise) + 1))[:size]
+    dates = "".join(
+        f"{rng.choice(MONTHS)} 20{10 + i % 14} - {rng.choice(MONTHS)} 20{11 + i % 14} "
+        for i in range(size // 20)
+    )[:size]
+    return {
+        # Projects keyword with no closing section, OCR noise after it
+        "unterminated_projects": "PROJECTS\n" + noise,
+        # One 1 MB line, no newlines at all
+        "single_line": "project " + "x" * size,
+        # Keyword repeated everywhere
+        "repeated_keywords": ("project skills " * (size // 15))[:size],
+        # Every line looks like a numbered project title
+        "numbered_lines": "PROJECTS\n" + "\n".join(
+            f"{i}) Item {i}" for i in range(size // 12)
+        )[:size],
+        # Every line looks like a heading
+        "all_headings": "\n".join(["EXPERIENCE", "SKILLS", "PROJECTS"] * (size // 27)),
+        # A flood of date ranges on one line
+        "date_flood": "EXPERIENCE\n" + dates,
+    }
+
+def run_worst_case(budget_ms=WORST_CASE_BUDGET_MS, seed=7):
+    results = {}
+    for name, text in worst_case_texts(random.Random(seed)).items():
+        stages = {}
+        start = time.perf_counter()
+        parse_resume.extract_rule_based(text, timings=stages)
+        total = (time.perf_counter() - start) * 1000
+        slowest = max(stages, key=stages.get)
+        results[name] = {
+            "chars": len(text),
+            "total_ms": round(total, 1),
+            "slowest_stage": slowest,
+            "slowest_ms": round(stages[slowest], 1),
+            "over_budget": total > budget_ms,
+        }
+    return results
+
+# ---------------------------------------------------
+# STAGE TIMING
+# ---------------------------------------------------
+# Stages are wrapped in place on the parse_resume module. Only the
+# outermost stage is recorded, so helpers called inside read_pdf (e.g.
+# index_sections) are not counted twice.
+class StageTimer:
+    def __init__(self):
+        self.samples = {s: [] for s in STAGES}
+        self.active = 0
+        self.llm_calls = 0
+        self.baseline_calls = 0
+        self.fields_asked = {}
+
+    def wrap(self, name, fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            if self.active:
+                return fn(*args, **kwargs)
+            self.active += 1
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.samples[name].append(time.perf_counter() - start)
+                self.active -= 1
+        return timed
+
+    def install(self):
+        for name in STAGES:
+            setattr(parse_resume, name, self.wrap(name, getattr(parse_resume, name)))
+
+def stub_llm(timer, delay_ms):
+    def fake_ollama_call(prompt, *args, **kwargs):
+        timer.llm_calls += 1
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+        return LLM_RESPONSE
+    parse_resume.ollama_call = fake_ollama_call
+
+def count_llm_decisions(timer, baseline_policy):
+    # Counts the fields the active policy asks for and, for the same rule
+    # results, whether baseline_policy would have called the LLM
+    decide = parse_resume.llm_fields
+
+    def counted(rule, policy=None):
+        asked = decide(rule, policy)
+        if baseline_policy:
+            timer.baseline_calls += bool(decide(rule, baseline_policy))
+        for f in asked:
+            timer.fields_asked[f] = timer.fields_asked.get(f, 0) + 1
+        return asked
+    parse_resume.llm_fields = counted
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KiB on Linux
+    return round(rss / (1 << 20) if sys.platform == "darwin" else rss / 1024, 1)
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+# ---------------------------------------------------
+# RUN
+# ---------------------------------------------------
+def run_benchmark(files, iterations=3, llm_delay_ms=0, baseline_policy="legacy"):
+    timer = StageTimer()
+    timer.install()
+    stub_llm(timer, llm_delay_ms)
+    count_llm_decisions(timer, baseline_policy)
+    cache = NullCache()
+    # Synthetic resumes are near-duplicates of each other: measure every
+    # parse in full instead of reusing LLM answers
+    parse_resume.DEDUP_INDEX = NullIndex()
+
+    # Warm-up pass (imports, regex caches, spaCy lazy state)
+    for f in files:
+        parse_resume.parse_resume(f, JOB_DESCRIPTION, cache=cache)
+    timer.samples = {s: [] for s in STAGES}
+    timer.llm_calls = timer.baseline_calls = 0
+    timer.fields_asked = {}
+
+    per_file = {os.path.basename(f): [] for f in files}
+    errors = {}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for f in files:
+            t0 = time.perf_counter()
+            try:
+                parse_resume.parse_resume(f, JOB_DESCRIPTION, cache=cache)
+            except Exception as e:
+                errors[os.path.basename(f)] = f"{type(e).__name__}: {e}"
+            per_file[os.path.basename(f)].append(time.perf_counter() - t0)
+    wall = time.perf_counter() - start
+
+    def summary(values):
+        return {
+            "calls": len(values),
+            "total_ms": round(sum(values) * 1000, 2),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        }
+
+    parses = iterations * len(files)
+    # LLM latency saved against the baseline policy, at the measured (or
+    # stubbed) cost of one call
+    llm_samples = timer.samples["llm_extract_resume"]
+    llm_ms_per_call = (
+        sum(llm_samples) * 1000 / len(llm_samples) if llm_samples else llm_delay_ms
+    )
+    saved_calls = timer.baseline_calls - timer.llm_calls
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pdf_backend": parse_resume.resolve_pdf_backend(),
+        "files": len(files),
+        "iterations": iterations,
+        "wall_s": round(wall, 3),
+        "parses_per_s": round(parses / wall, 2) if wall else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "llm_calls": timer.llm_calls,
+        "llm_call_rate": round(timer.llm_calls / parses, 3) if parses else 0.0,
+        "llm_policy": parse_resume.LLM_POLICY,
+        "llm_fields_asked": timer.fields_asked,
+        "policy_comparison": {
+            "baseline": baseline_policy,
+            "baseline_llm_calls": timer.baseline_calls,
+            "baseline_llm_call_rate": (
+                round(timer.baseline_calls / parses, 3) if parses else 0.0
+            ),
+            "llm_calls_saved": saved_calls,
+            "llm_ms_per_call": round(llm_ms_per_call, 2),
+            "llm_ms_saved": round(saved_calls * llm_ms_per_call, 1),
+            "llm_ms_saved_per_parse": (
+                round(saved_calls * llm_ms_per_call / parses, 2) if parses else 0.0
+            ),
+        } if baseline_policy else None,
+        "stages": {s: summary(v) for s, v in timer.samples.items()},
+        "per_file": {f: summary(v) for f, v in per_file.items()},
+        "errors": errors,
+    }
+
+def compare(baseline, current):
+    print(f"{'stage':<22}{'p50 before':>12}{'p50 now':>12}{'p95 before':>12}{'p95 now':>12}")
+    for stage, now in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before:
+            continue
+        print(f"{stage:<22}{before['p50_ms']:>12}{now['p50_ms']:>12}"
+              f"{before['p95_ms']:>12}{now['p95_ms']:>12}")
+    print(f"{'wall_s':<22}{baseline.get('wall_s'):>12}{current['wall_s']:>12}")
+    print(f"{'llm_call_rate':<22}{baseline.get('llm_call_rate'):>12}"
+          f"{current['llm_call_rate']:>12}")
+
+# ---------------------------------------------------
+# CLI
+# ---------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark parse_resume stages")
+    parser.add_argument("files", nargs="*", help="extra PDFs to include")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--no-samples", action="store_true",
+                        help="skip the sample CVs in Doc/")
+    parser.add_argument("--no-synthetic", action="store_true",
+                        help="skip the generated synthetic/adversarial PDFs")
+    parser.add_argument("--llm-delay-ms", type=float, default=0,
+                        help="latency of the stubbed LLM call")
+    parser.add_argument("--policy", choices=["confidence", "legacy", "never"],
+                        help="LLM policy to benchmark (default: LLM_POLICY)")
+    parser.add_argument("--baseline-policy", default="legacy",
+                        help="policy the LLM call rate is compared against "
+                             "('' to skip)")
+    parser.add_argument("--out", help="result JSON path (default: bench_results/)")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="earlier result JSON to compare against")
+    parser.add_argument("--worst-case", action="store_true",
+                        help="time the rule-based stages on 1 MB pathological "
+                             "text and exit 1 if any input exceeds --budget-ms")
+    parser.add_argument("--budget-ms", type=float, default=WORST_CASE_BUDGET_MS)
+    args = parser.parse_args()
+
+    if args.worst_case:
+        results = run_worst_case(args.budget_ms)
+        print(json.dumps(results, indent=2))
+        sys.exit(1 if any(r["over_budget"] for r in results.values()) else 0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = list(args.files)
+        if not args.no_samples and os.path.isdir(DOC_DIR):
+            files += sorted(
+                os.path.join(DOC_DIR, f) for f in os.listdir(DOC_DIR)
+                if f.lower().endswith(".pdf")
+            )
+        if not args.no_synthetic:
+            files += build_synthetic_corpus(tmp)
+        if not files:
+            parser.error("no PDFs to benchmark")
+
+        if args.policy:
+            parse_resume.LLM_POLICY = args.policy
+        result = run_benchmark(
+            files, args.iterations, args.llm_delay_ms, args.baseline_policy
+        )
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{result['commit'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Saved {out}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), result)
+    else:
+        print(json.dumps({k: result[k] for k in (
+            "wall_s", "parses_per_s", "peak_rss_mb", "llm_call_rate",
+            "llm_policy", "policy_comparison")}, indent=2))
@@ -0,0 +1,99 @@
+import json
+import asyncio
+import argparse
+
+# ---------------------------------------------------
+# LOCAL STUB FOR GEMINI generateContent
+# ---------------------------------------------------
+# Answers the three prompts of parse_resume-gemini.py with canned replies
+# after --delay seconds each, so concurrent calls finish in about one delay
+# and sequential ones in three. --stall never answers one kind of prompt to
+# exercise the per-call timeout. Run with:
+#   GEMINI_BASE_URL=http://127.0.0.1:11436 GEMINI_API_KEY=stub \
+#       python parse_resume-gemini.py resume.pdf
+CANNED = {
+    "skills": json.dumps({"skills": [{"name": "Python", "score": 90},
+                                     {"name": "React", "score": 70}]}),
+    "projects": "```json\n" + json.dumps({"projects": [
+        {"title": "Stub", "description": "Stub project", "stack": ["Python"]}
+    ]}) + "\n```",
+    "summary": "- Stub candidate\n- Builds things\n- Ships them\n- Fixes them",
+}
+
+# Fixed opening words of each prompt; the resume text follows them and may
+# contain any of these words itself
+PROMPT_OPENINGS = {
+    "Extract only TECHNICAL skills": "skills",
+    "Extract ONLY projects": "projects",
+    "Summarize resume": "summary",
+}
+
+def prompt_kind(payload):
+    text = " ".join(
+        part.get("text", "")
+        for content in payload.get("contents", [])
+        for part in content.get("parts", [])
+    ).lstrip()
+    for opening, kind in PROMPT_OPENINGS.items():
+        if text.startswith(opening):
+            return kind
+    return "summary"
+
+def reply(text):
+    return {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "finishReason": "STOP",
+            "index": 0,
+        }],
+        "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": 0},
+    }
+
+async def handle(reader, writer, args):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = line.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            kind = prompt_kind(json.loads(body or b"{}"))
+
+            if kind == args.stall:
+                await asyncio.Event().wait()
+            await asyncio.sleep(args.delay)
+
+            data = json.dumps(reply(CANNED[kind])).encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/json; charset=UTF-8\r\n"
+                b"Content-Length: %d\r\n\r\n%s" % (len(data), data)
+            )
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def main(args):
+    server = await asyncio.start_server(
+        lambda r, w: handle(r, w, args), args.host, args.port
+    )
+    print(f"Gemini stub on http://{args.host}:{args.port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Gemini generateContent stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11436)
+    parser.add_argument("--delay", type=float, default=1.0)
+    parser.add_argument("--stall", choices=sorted(CANNED), help="never answer this prompt")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+
+from skill_taxonomy import current_taxonomy, match_skills, resume_skill_keys
+
+# ---------------------------------------------------
+# CONFIG
+# ---------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_JOBS_PATH = os.path.join(
+    BASE_DIR, "..", "..", "Client", "public", "data", "jobs.json"
+)
+DEFAULT_INDEX_PATH = os.path.join(BASE_DIR, ".cache", "job_index.json")
+
+# Skill IDs (bit positions) come from the taxonomy artifact: skill_ids
+# lists the technical skills in taxonomy order, skill_id maps them back.
+
+# ---------------------------------------------------
+# JOB DESCRIPTION -> SKILL BITSET
+# ---------------------------------------------------
+def job_text(job):
+    if isinstance(job, str):
+        return job
+
+    parts = []
+    for field in ("title", "description", "requirements",
+                  "responsibilities", "skills_required"):
+        value = job.get(field)
+        if isinstance(value, list):
+            parts.extend(str(v) for v in value)
+        elif value:
+            parts.append(str(value))
+    return "\n".join(parts)
+
+def skill_mask(skills, taxonomy):
+    skill_id = taxonomy["skill_id"]
+    mask = 0
+    for skill in resume_skill_keys(skills):
+        if skill in skill_id:
+            mask |= 1 << skill_id[skill]
+    return mask
+
+def mask_skills(mask, taxonomy):
+    # Walks the set bits only (lowest first)
+    skill_ids = taxonomy["skill_ids"]
+    skills = []
+    while mask:
+        low = mask & -mask
+        skills.append(skill_ids[low.bit_length() - 1])
+        mask ^= low
+    return skills
+
+def job_skill_mask(job, taxonomy):
+    # Same skill detection as calculate_ats_score
+    return skill_mask(match_skills(job_text(job).lower(), taxonomy["matcher"]), taxonomy)
+
+# ---------------------------------------------------
+# BUILD / SAVE / LOAD
+# ---------------------------------------------------
+def build_job_index(jobs, source_mtime=None):
+    taxonomy = current_taxonomy()
+    return {
+        "taxonomy_version": taxonomy["version"],
+        "source_mtime": source_mtime,
+        "jobs": [
+            {
+                "id": job.get("id", i + 1) if isinstance(job, dict) else i + 1,
+                "title": job.get("title") if isinstance(job, dict) else None,
+                "company": job.get("company") if isinstance(job, dict) else None,
+                "mask": job_skill_mask(job, taxonomy),
+            }
+            for i, job in enumerate(jobs)
+        ],
+    }
+
+def save_job_index(index, path=DEFAULT_INDEX_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    data = {
+        **index,
+        "skills": current_taxonomy()["skill_ids"],
+        # Bitsets are stored as hex so the file stays plain JSON
+        "jobs": [{**j, "mask": format(j["mask"], "x")} for j in index["jobs"]],
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+def load_job_index(path=DEFAULT_INDEX_PATH):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    # Skill IDs are positional, so a changed taxonomy invalidates the file
+    if data.get("taxonomy_version") != current_taxonomy()["version"]:
+        return None
+
+    data["jobs"] = [{**j, "mask": int(j["mask"], 16)} for j in data["jobs"]]
+    return data
+
+# The loaded index stays in memory for --serve workers; only the mtime of
+# jobs.json and the taxonomy version are checked per call
+_loaded = None
+_loaded_lock = threading.Lock()
+
+def _is_current(index, source_mtime):
+    return (
+        index is not None
+        and index.get("taxonomy_version") == current_taxonomy()["version"]
+        and (source_mtime is None or index.get("source_mtime") == source_mtime)
+    )
+
+def get_job_index(jobs_path=DEFAULT_JOBS_PATH, index_path=DEFAULT_INDEX_PATH):
+    global _loaded
+    source_mtime = os.path.getmtime(jobs_path) if os.path.exists(jobs_path) else None
+    loaded = _loaded
+    if loaded and loaded[0] == (jobs_path, index_path) and _is_current(loaded[1], source_mtime):
+        return loaded[1]
+
+    with _loaded_lock:
+        index = _read_job_index(jobs_path, index_path, source_mtime)
+        _loaded = ((jobs_path, index_path), index)
+    return index
+
+def _read_job_index(jobs_path, index_path, source_mtime):
+    # Load the stored index, rebuilding it when jobs.json or the skill
+    # taxonomy has changed
+    index = None
+    if os.path.exists(index_path):
+        index = load_job_index(index_path)
+    if _is_current(index, source_mtime):
+        return index
+
+    if source_mtime is None:
+        raise FileNotFoundError(f"No job index or jobs file at {jobs_path}")
+
+    with open(jobs_path, encoding="utf-8") as f:
+        index = build_job_index(json.load(f), source_mtime)
+    save_job_index(index, index_path)
+    return index
+
+# ---------------------------------------------------
+# MATCH A RESUME AGAINST ALL INDEXED JOBS
+# ---------------------------------------------------
+# top_k=None scores every job. "index" is the job's position in jobs.json.
+def match_jobs(resume_skills, index, top_k=10):
+    taxonomy = current_taxonomy()
+    if index.get("taxonomy_version") != taxonomy["version"]:
+        raise ValueError("Job index was built with a different skill taxonomy")
+    resume_mask = skill_mask(resume_skills, taxonomy)
+
+    # One AND + popcount per job; scoring mirrors calculate_ats_score
+    scored = []
+    for pos, job in enumerate(index["jobs"]):
+        job_mask = job["mask"]
+        if not job_mask:
+            continue
+        total = bin(job_mask).count("1")
+        matched = bin(job_mask & resume_mask).count("1")
+        scored.append((int(matched / total * 100), matched, pos))
+
+    scored.sort(key=lambda x: (-x[0], -x[1], x[2]))
+
+    results = []
+    for score, _, pos in scored[:top_k]:
+        job = index["jobs"][pos]
+        results.append({
+            "id": job["id"],
+            "index": pos,
+            "title": job["title"],
+            "company": job["company"],
+            "ats_score": score,
+            "matched_skills": mask_skills(job["mask"] & resume_mask, taxonomy),
+            "missing_skills": mask_skills(job["mask"] & ~resume_mask, taxonomy),
+        })
+    return results
+
+# ---------------------------------------------------
+# BENCHMARK (index vs. calculate_ats_score per job)
+# ---------------------------------------------------
+# Synthetic jobs drawn from the taxonomy; the old path matches every job
+# description's text for each resume, the index only ANDs bitsets.
+def bench(jobs=2000, resumes=50, seed=1):
+    from parse_resume import calculate_ats_score
+
+    taxonomy = current_taxonomy()
+    skills = taxonomy["skill_ids"]
+    rng = random.Random(seed)
+    descriptions = [
+        "Looking for " + ", ".join(rng.sample(skills, rng.randint(3, 12)))
+        for _ in range(jobs)
+    ]
+    resume_sets = [
+        {s: 50 for s in rng.sample(skills, rng.randint(3, 20))} for _ in range(resumes)
+    ]
+
+    start = time.perf_counter()
+    old = [[calculate_ats_score(r, d)[0] for d in descriptions] for r in resume_sets]
+    old_ms = (time.perf_counter() - start) * 1000 / resumes
+
+    index = build_job_index(descriptions)
+    start = time.perf_counter()
+    new = [match_jobs(r, index, None) for r in resume_sets]
+    new_ms = (time.perf_counter() - start) * 1000 / resumes
+
+    agree = all(
+        sorted(scores, reverse=True)[:len(ranked)] == [j["ats_score"] for j in ranked]
+        for scores, ranked in zip(old, new)
+    )
+    return {"jobs": jobs, "old_ms_per_resume": round(old_ms, 2),
+            "index_ms_per_resume": round(new_ms, 2),
+            "speedup": round(old_ms / new_ms, 1), "scores_agree": agree}
+
+# ---------------------------------------------------
+# CLI
+# ---------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precomputed job skill index")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="index a jobs.json file")
+    build.add_argument("jobs", nargs="?", default=DEFAULT_JOBS_PATH)
+    build.add_argument("--index", default=DEFAULT_INDEX_PATH)
+
+    match = sub.add_parser("match", help="top-k jobs for a parsed resume")
+    match.add_argument("resume", help="parse_resume JSON output ('-' for stdin)")
+    match.add_argument("--jobs", default=DEFAULT_JOBS_PATH)
+    match.add_argument("--index", default=DEFAULT_INDEX_PATH)
+    match.add_argument("--top", type=int, default=10)
+
+    bench_cmd = sub.add_parser("bench", help="time the index against per-job ATS scoring")
+    bench_cmd.add_argument("--jobs", type=int, default=2000)
+    bench_cmd.add_argument("--resumes", type=int, default=50)
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        with open(args.jobs, encoding="utf-8") as f:
+            index = build_job_index(json.load(f), os.path.getmtime(args.jobs))
+        save_job_index(index, args.index)
+        print(f"Indexed {len(index['jobs'])} jobs -> {args.index}", file=sys.stderr)
+    elif args.command == "bench":
+        print(json.dumps(bench(args.jobs, args.resumes), indent=2))
+    else:
+        if args.resume == "-":
+            parsed = json.load(sys.stdin)
+        else:
+            with open(args.resume, encoding="utf-8") as f:
+                parsed = json.load(f)
+        index = get_job_index(args.jobs, args.index)
+        print(json.dumps(match_jobs(parsed.get("skills", {}), index, args.top), indent=2))
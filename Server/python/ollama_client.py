@@ -0,0 +1,593 @@
+import os
+import re
+import json
+import time
+import heapq
+import atexit
+import asyncio
+import argparse
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+
+# ---------------------------------------------------
+# CONFIG
+# ---------------------------------------------------
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434/api/generate")
+# Match the server's OLLAMA_NUM_PARALLEL: extra requests would only queue there
+OLLAMA_CONCURRENCY = int(os.environ.get("OLLAMA_NUM_PARALLEL", "1"))
+# This process's share of those slots when several processes use the same
+# server (the Node worker pool sets it per worker, --batch per pool
+# process). Every process keeps at least one slot, so with more processes
+# than OLLAMA_NUM_PARALLEL the server still queues the excess; priorities
+# only order requests within one process.
+OLLAMA_SLOTS = int(os.environ.get("OLLAMA_SLOTS") or OLLAMA_CONCURRENCY)
+OLLAMA_TIMEOUT = float(os.environ.get("OLLAMA_TIMEOUT", "120"))
+# How long the scheduler collects requests before dispatching a batch
+OLLAMA_BATCH_WINDOW_MS = float(os.environ.get("OLLAMA_BATCH_WINDOW_MS", "25"))
+# Fresh generations after one was aborted as malformed JSON
+OLLAMA_RETRIES = int(os.environ.get("OLLAMA_RETRIES", "1"))
+# Stream lines still read after the object is complete, so the connection
+# can go back to the pool; a model that keeps talking past this is cut off
+OLLAMA_DRAIN_LINES = int(os.environ.get("OLLAMA_DRAIN_LINES", "16"))
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+PRIORITIES = {"interactive": PRIORITY_INTERACTIVE, "bulk": PRIORITY_BULK}
+
+
+class OllamaError(RuntimeError):
+    pass
+
+# ---------------------------------------------------
+# INCREMENTAL JSON VALIDATOR
+# ---------------------------------------------------
+# Checks the generation character by character against the JSON grammar.
+# It reports where the first top-level {...} ends, and generation is
+# aborted at the first character that cannot continue a valid object
+# (a retry then costs only the tokens up to that point, not the whole
+# num_predict budget). Raw control characters inside strings are let
+# through; callers parse with json.loads(strict=False).
+class MalformedJsonError(OllamaError):
+    pass
+
+
+# Prose allowed before the opening brace (models without `format`)
+MAX_PREAMBLE_CHARS = 200
+NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+NUMBER_CHARS = frozenset("0123456789+-.eE")
+LITERALS = {"t": "true", "f": "false", "n": "null"}
+ESCAPES = frozenset('"\\/bfnrtu')
+HEX = frozenset("0123456789abcdefABCDEF")
+WHITESPACE = frozenset(" \t\r\n")
+
+
+class JsonStreamValidator:
+    def __init__(self, max_preamble=MAX_PREAMBLE_CHARS):
+        self.max_preamble = max_preamble
+        self.stack = []        # "{" / "[" of the open containers
+        self.state = "pre"
+        self.start = None      # offset of the opening brace
+        self.pos = 0
+        self.token = ""        # number or literal being read
+        self.is_key = False
+        self.unicode = 0       # hex digits still expected after \u
+
+    def _fail(self, offset, ch, expected):
+        error = MalformedJsonError(
+            f"malformed JSON at offset {offset}: {ch!r} (expected {expected})"
+        )
+        error.offset = offset
+        raise error
+
+    def _end_value(self):
+        self.state = "after_value" if self.stack else "done"
+
+    def feed(self, text):
+        # Returns the end offset of the object in all text fed so far, or
+        # None; raises MalformedJsonError on the first invalid character
+        for i, ch in enumerate(text):
+            offset = self.pos + i
+            state = self.state
+
+            if state == "string":
+                if self.unicode:
+                    if ch not in HEX:
+                        self._fail(offset, ch, "hex digit")
+                    self.unicode -= 1
+                elif self.token == "\\":
+                    if ch not in ESCAPES:
+                        self._fail(offset, ch, "escape")
+                    self.token = ""
+                    self.unicode = 4 if ch == "u" else 0
+                elif ch == "\\":
+                    self.token = "\\"
+                elif ch == '"':
+                    if self.is_key:
+                        self.state = "colon"
+                    else:
+                        self._end_value()
+                continue
+
+            if state == "number":
+                if ch in NUMBER_CHARS:
+                    self.token += ch
+                    continue
+                if not NUMBER_RE.fullmatch(self.token):
+                    self._fail(offset, self.token, "number")
+                self._end_value()
+                state = self.state
+
+            elif state == "literal":
+                word = LITERALS[self.token[0]]
+                self.token += ch
+                if not word.startswith(self.token):
+                    self._fail(offset, ch, word)
+                if self.token == word:
+                    self._end_value()
+                continue
+
+            if state == "pre":
+                if ch == "{":
+                    self.start = offset
+                    self.stack.append("{")
+                    self.state = "key_or_close"
+                elif offset >= self.max_preamble:
+                    self._fail(offset, ch, "'{' within the preamble")
+                continue
+
+            if ch in WHITESPACE:
+                continue
+
+            if state in ("value", "value_or_close"):
+                if ch == "]" and state == "value_or_close":
+                    self._close(offset, ch)
+                elif ch == '"':
+                    self.state, self.is_key, self.token = "string", False, ""
+                elif ch in "{[":
+                    self.stack.append(ch)
+                    self.state = "key_or_close" if ch == "{" else "value_or_close"
+                elif ch == "-" or ch.isdigit():
+                    self.state, self.token = "number", ch
+                elif ch in LITERALS:
+                    self.state, self.token = "literal", ch
+                else:
+                    self._fail(offset, ch, "value")
+            elif state in ("key", "key_or_close"):
+                if ch == "}" and state == "key_or_close":
+                    self._close(offset, ch)
+                elif ch == '"':
+                    self.state, self.is_key, self.token = "string", True, ""
+                else:
+                    self._fail(offset, ch, "key")
+            elif state == "colon":
+                if ch != ":":
+                    self._fail(offset, ch, "':'")
+                self.state = "value"
+            elif state == "after_value":
+                if ch == ",":
+                    self.state = "key" if self.stack[-1] == "{" else "value"
+                elif ch in "}]":
+                    self._close(offset, ch)
+                else:
+                    self._fail(offset, ch, "',' or closing bracket")
+
+            if self.state == "done":
+                return offset + 1
+
+        self.pos += len(text)
+        return None
+
+    def _close(self, offset, ch):
+        if self.stack[-1] != ("{" if ch == "}" else "["):
+            self._fail(offset, ch, "matching bracket")
+        self.stack.pop()
+        self._end_value()
+
+# ---------------------------------------------------
+# ASYNC CLIENT (keep-alive pool + concurrency limit)
+# ---------------------------------------------------
+# Plain asyncio streams speaking HTTP/1.1, so no extra dependency is needed.
+class OllamaClient:
+    def __init__(self, url=OLLAMA_URL, concurrency=OLLAMA_CONCURRENCY,
+                 timeout=OLLAMA_TIMEOUT, retries=OLLAMA_RETRIES,
+                 drain_lines=OLLAMA_DRAIN_LINES):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path or "/api/generate"
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.retries = max(0, retries)
+        self.drain_lines = drain_lines
+        self._limit = None
+        self._idle = []
+        self.counts = {"malformed_aborts": 0, "aborted_chars": 0, "connections": 0}
+
+    async def _connect(self):
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        self.counts["connections"] += 1
+        return reader, writer, False
+
+    def _release(self, reader, writer, reusable):
+        if reusable and len(self._idle) < self.concurrency:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    async def generate(self, payload, stop_on_json=True):
+        # Created lazily so the semaphore binds to the running loop
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.concurrency)
+
+        async with self._limit:
+            return await asyncio.wait_for(
+                self._generate_retrying(payload, stop_on_json), self.timeout
+            )
+
+    async def _generate_retrying(self, payload, stop_on_json):
+        for attempt in range(self.retries + 1):
+            try:
+                return await self._generate(payload, stop_on_json)
+            except MalformedJsonError as e:
+                self.counts["malformed_aborts"] += 1
+                self.counts["aborted_chars"] += e.offset
+                if attempt == self.retries:
+                    raise
+                # Retry greedy: the sampled path is what went wrong
+                payload = {
+                    **payload,
+                    "options": {**payload.get("options", {}), "temperature": 0},
+                }
+
+    async def _generate(self, payload, stop_on_json):
+        body = json.dumps({**payload, "stream": True}).encode("utf-8")
+        request = (
+            f"POST {self.path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("ascii") + body
+
+        for attempt in range(2):
+            reader, writer, reused = await self._connect()
+            try:
+                writer.write(request)
+                await writer.drain()
+                return await self._read_stream(reader, writer, stop_on_json)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                # A pooled connection may have been closed by the server
+                if not reused or attempt:
+                    raise
+
+    async def _read_stream(self, reader, writer, stop_on_json):
+        # The connection goes back to the pool only after a complete
+        # response; any other exit (error, timeout, cancellation, early
+        # stop) closes it, which also makes Ollama stop generating
+        released = False
+
+        def release(reusable):
+            nonlocal released
+            self._release(reader, writer, reusable)
+            released = True
+
+        try:
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionResetError("connection closed by server")
+            status = int(status_line.split()[1])
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = line.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+
+            chunked = "chunked" in headers.get("transfer-encoding", "")
+            length = int(headers.get("content-length", 0))
+            reusable = headers.get("connection", "").lower() != "close"
+
+            async def chunks():
+                if not chunked:
+                    if length:
+                        yield await reader.readexactly(length)
+                    return
+                while True:
+                    size = int((await reader.readline()).split(b";")[0], 16)
+                    if size == 0:
+                        # Skip trailers up to the blank line
+                        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                            pass
+                        return
+                    data = await reader.readexactly(size + 2)
+                    yield data[:-2]
+
+            if status != 200:
+                err = b"".join([c async for c in chunks()]).decode("utf-8", "replace")
+                release(reusable)
+                raise OllamaError(f"Ollama HTTP {status}: {err[:200]}")
+
+            validator = JsonStreamValidator()
+            tokens = []
+            buffer = b""
+            result = None
+            trailing = 0
+
+            async for data in chunks():
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    msg = json.loads(line)
+                    if msg.get("error"):
+                        raise OllamaError(msg["error"])
+
+                    if result is not None:
+                        # Object complete: read on to "done" (with `format` the
+                        # model stops right after it) so the connection is
+                        # reused; drop it only if the model keeps going
+                        trailing += 1
+                        if trailing > self.drain_lines:
+                            return result
+                        continue
+
+                    token = msg.get("response", "")
+                    tokens.append(token)
+
+                    if not stop_on_json:
+                        continue
+                    end = validator.feed(token)
+                    if end is not None:
+                        result = "".join(tokens)[validator.start:end]
+
+            # Stream fully read (including the final chunk): safe to reuse
+            release(reusable)
+            return "".join(tokens) if result is None else result
+        finally:
+            if not released:
+                writer.close()
+
+# ---------------------------------------------------
+# MICRO-BATCHING SCHEDULER
+# ---------------------------------------------------
+# Requests are collected for a short window, then dispatched in priority
+# order (interactive uploads before bulk imports) with at most `parallel`
+# generations in flight. Slots freed by a finished call are refilled at
+# once, so the window only delays requests that arrive to an idle model.
+class LlmScheduler:
+    def __init__(self, client, parallel=OLLAMA_CONCURRENCY,
+                 window_ms=OLLAMA_BATCH_WINDOW_MS):
+        self.client = client
+        self.parallel = max(1, parallel)
+        self.window = window_ms / 1000
+        self._queue = []
+        self._seq = 0
+        self._running = 0
+        self._wakeup = None
+        self._dispatcher = None
+        self._waits = deque(maxlen=1000)
+        self._counts = {"submitted": 0, "completed": 0, "failed": 0, "batches": 0}
+
+    async def submit(self, payload, priority=PRIORITY_INTERACTIVE, stop_on_json=True):
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None:
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._collect())
+
+        future = loop.create_future()
+        self._seq += 1
+        heapq.heappush(
+            self._queue,
+            (priority, self._seq, time.perf_counter(), payload, stop_on_json, future)
+        )
+        self._counts["submitted"] += 1
+        self._wakeup.set()
+        return await future
+
+    async def _collect(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self._running < self.parallel and self.window:
+                await asyncio.sleep(self.window)
+            self._dispatch()
+
+    def _dispatch(self):
+        started = 0
+        while self._queue and self._running < self.parallel:
+            _, _, queued_at, payload, stop_on_json, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            self._waits.append(time.perf_counter() - queued_at)
+            self._running += 1
+            started += 1
+            asyncio.get_running_loop().create_task(
+                self._call(payload, stop_on_json, future)
+            )
+        if started:
+            self._counts["batches"] += 1
+
+    async def _call(self, payload, stop_on_json, future):
+        try:
+            result = await self.client.generate(payload, stop_on_json)
+            self._counts["completed"] += 1
+            if not future.done():
+                future.set_result(result)
+        except Exception as e:
+            self._counts["failed"] += 1
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self._running -= 1
+            self._dispatch()
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        await self.client.close()
+
+    def metrics(self):
+        waits = sorted(self._waits)
+
+        def pct(p):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))] * 1000, 1)
+
+        return {
+            **self._counts,
+            **self.client.counts,
+            "queue_depth": len(self._queue),
+            "in_flight": self._running,
+            "parallel": self.parallel,
+            "wait_ms_p50": pct(0.5),
+            "wait_ms_p95": pct(0.95),
+            "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0,
+        }
+
+# ---------------------------------------------------
+# SYNC BRIDGE (one background loop per process)
+# ---------------------------------------------------
+# parse_resume is synchronous; a long-lived loop thread keeps the
+# connection pool and the scheduler alive between calls, and lets
+# concurrent parses in one worker share a batch.
+_loop = None
+_thread = None
+_scheduler = None
+_slots = OLLAMA_SLOTS
+_bridge_lock = threading.Lock()
+
+def share_slots(processes, total=OLLAMA_SLOTS):
+    return max(1, total // max(1, processes))
+
+def set_slots(slots):
+    # Before the first call in this process (e.g. a pool initializer)
+    global _slots
+    _slots = max(1, slots)
+
+def _background_loop():
+    global _loop, _thread, _scheduler
+    with _bridge_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, daemon=True)
+            _thread.start()
+            _scheduler = LlmScheduler(OllamaClient(concurrency=_slots), _slots)
+    return _loop, _scheduler
+
+async def _cancel_pending():
+    # Dispatcher and any call still in flight, then the idle connections
+    current = asyncio.current_task()
+    tasks = [t for t in asyncio.all_tasks() if t is not current]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await _scheduler.close()
+
+@atexit.register
+def _shutdown():
+    # Without this, the daemon loop dies with its tasks pending and the
+    # interpreter prints "Task was destroyed but it is pending!" on exit
+    loop = _loop
+    if loop is None or loop.is_closed() or not _thread.is_alive():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_cancel_pending(), loop).result(timeout=5)
+    except Exception:
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+    _thread.join(timeout=5)
+    if not loop.is_running():
+        loop.close()
+
+def generate_sync(payload, stop_on_json=True, priority=PRIORITY_INTERACTIVE):
+    loop, scheduler = _background_loop()
+    future = asyncio.run_coroutine_threadsafe(
+        scheduler.submit(payload, priority, stop_on_json), loop
+    )
+    return future.result()
+
+def scheduler_metrics():
+    if _scheduler is None:
+        return {}
+    future = asyncio.run_coroutine_threadsafe(_async_metrics(), _loop)
+    return future.result()
+
+async def _async_metrics():
+    return _scheduler.metrics()
+
+# ---------------------------------------------------
+# LOAD CHECK (run against Ollama or ollama_stub.py)
+# ---------------------------------------------------
+async def _bench(url, requests, concurrency, bulk_share):
+    client = OllamaClient(url, concurrency)
+    scheduler = LlmScheduler(client, concurrency)
+    payload = {"model": "stub", "prompt": "Return JSON", "options": {}}
+    latencies = {PRIORITY_INTERACTIVE: [], PRIORITY_BULK: []}
+
+    async def one(priority):
+        start = time.perf_counter()
+        try:
+            await scheduler.submit(payload, priority)
+        except MalformedJsonError:
+            return  # counted in the scheduler metrics
+        latencies[priority].append(time.perf_counter() - start)
+
+    bulk = int(requests * bulk_share)
+    priorities = [PRIORITY_BULK] * bulk + [PRIORITY_INTERACTIVE] * (requests - bulk)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(p) for p in priorities))
+    elapsed = time.perf_counter() - start
+    await scheduler.close()
+
+    def pct(values, p):
+        values = sorted(values)
+        if not values:
+            return 0.0
+        return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 1)
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "req_per_s": round(requests / elapsed, 2),
+        **{
+            f"{name}_p{int(p * 100)}_ms": pct(latencies[prio], p)
+            for name, prio in PRIORITIES.items()
+            for p in (0.5, 0.95)
+        },
+        "scheduler": scheduler.metrics(),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ollama client load check")
+    parser.add_argument("--url", default=OLLAMA_URL)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=OLLAMA_CONCURRENCY)
+    parser.add_argument("--bulk-share", type=float, default=0.5,
+                        help="fraction of requests submitted as bulk imports")
+    args = parser.parse_args()
+
+    report = asyncio.run(
+        _bench(args.url, args.requests, args.concurrency, args.bulk_share)
+    )
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,91 @@
+import json
+import asyncio
+import argparse
+
+# ---------------------------------------------------
+# LOCAL STUB FOR OLLAMA /api/generate
+# ---------------------------------------------------
+# Streams a canned resume JSON token by token (chunked NDJSON, keep-alive).
+# Without a `format` in the request it is followed by chatter, as plain
+# prompting often is. --parallel mimics the server's OLLAMA_NUM_PARALLEL.
+# --malformed N breaks the JSON of the first N replies (a trailing comma
+# halfway through) to exercise the client's abort and retry.
+CANNED = {
+    "name": "Stub Candidate",
+    "email": "stub@example.com",
+    "phone": "",
+    "skills": ["python", "react"],
+    "experience_years": 1,
+    "education": [],
+    "projects": [{"title": "Stub", "description": "Stub project", "tech_stack": []}],
+}
+TRAILER = "\n\nHope this helps! Let me know if you need anything else."
+MALFORMED = '{"name": "Stub Candidate", "skills": ["python",], ' + "x" * 400
+
+def tokenize(text, size=4):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+async def handle(reader, writer, args, slots):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = line.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            payload = json.loads(body or b"{}")
+
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/x-ndjson\r\n"
+                b"Transfer-Encoding: chunked\r\n\r\n"
+            )
+
+            async with slots:
+                broken = args.malformed > 0
+                args.malformed -= broken
+                trailer = "" if payload.get("format") else TRAILER
+                tokens = tokenize(MALFORMED if broken else json.dumps(CANNED) + trailer)
+                for i, token in enumerate(tokens):
+                    await asyncio.sleep(args.token_delay)
+                    msg = {
+                        "model": payload.get("model", "stub"),
+                        "response": token,
+                        "done": i == len(tokens) - 1,
+                    }
+                    line = (json.dumps(msg) + "\n").encode("utf-8")
+                    writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+                    await writer.drain()
+
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def main(args):
+    slots = asyncio.Semaphore(args.parallel)
+    server = await asyncio.start_server(
+        lambda r, w: handle(r, w, args, slots), args.host, args.port
+    )
+    print(f"Ollama stub on http://{args.host}:{args.port}/api/generate", flush=True)
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Ollama /api/generate stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--parallel", type=int, default=1)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--malformed", type=int, default=0,
+                        help="send broken JSON for the first N requests")
+    asyncio.run(main(parser.parse_args()))
@@ -2,21 +2,56 @@ import os
 import re
 import sys
 import json
+import threading
+import time
 import pdfplumber
 import spacy
-from collections import Counter
 from datetime import datetime
 from dotenv import load_dotenv
 from google import genai
 
+from skill_taxonomy import current_taxonomy, match_skills
+
 
 
 
 load_dotenv()
-client = genai.Client()
 
 nlp = spacy.load("en_core_web_sm")
 
+# ---------------------------------------------------
+# CONFIG
+# ---------------------------------------------------
+# GEMINI_MODEL=gemini-2.5-flash
+# GEMINI_TIMEOUT_S=30           per-call budget; a call that has not answered
+#                               by then falls back to the rule-based result
+# GEMINI_BASE_URL=...           point the client elsewhere (gemini_stub.py)
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
+GEMINI_TIMEOUT_S = float(os.environ.get("GEMINI_TIMEOUT_S", "30"))
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL", "")
+
+# ---------------------------------------------------
+# GEMINI CLIENT
+# ---------------------------------------------------
+# Created on first use so the module imports without credentials; callers
+# (and tests against a local fake) can pass their own client instead.
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            http_options = {"timeout": int(GEMINI_TIMEOUT_S * 1000)}
+            if GEMINI_BASE_URL:
+                http_options["base_url"] = GEMINI_BASE_URL
+            _client = genai.Client(http_options=http_options)
+        return _client
+
+def generate(client, prompt):
+    r = client.models.generate_content(model=GEMINI_MODEL, contents=prompt)
+    return r.text or ""
+
 # ---------------------------------------------------
 # READ PDF
 # ---------------------------------------------------
@@ -148,111 +183,20 @@ def extract_education(text):
 # ---------------------------------------------------
 # RULE-BASED SKILLS (FAST)
 # ---------------------------------------------------
-from collections import Counter
-import re
-
 def extract_skills_rule(text):
     text = text.lower()
 
     # ---------------------------------
-    # Skill dictionary with aliases
+    # Shared skill taxonomy (skills_taxonomy.json), technical skills only
     # ---------------------------------
-    SKILL_MAP = {
-
-        # Frontend
-        "html": ["html5"],
-        "css": ["css3"],
-        "javascript": ["js", "ecmascript"],
-        "typescript": ["ts"],
-        "react": ["reactjs", "react.js"],
-        "angular": ["angularjs"],
-        "vue": ["vuejs"],
-        "bootstrap": [],
-        "tailwind": ["tailwindcss"],
-        "jquery": [],
-        "next.js": ["nextjs"],
-        "vite": [],
-
-        # Backend
-        "node": ["nodejs", "node.js"],
-        "express": ["expressjs", "express.js"],
-        "python": [],
-        "django": [],
-        "flask": [],
-        "fastapi": [],
-        "java": ["core java", "advanced java"],
-        "spring": ["spring boot"],
-        "php": [],
-        "laravel": [],
-        "c": [],
-        "c++": ["cpp"],
-        "c#": ["csharp", ".net"],
-        "golang": ["go"],
-        "ruby": [],
-        "rails": ["ruby on rails"],
-
-        # Databases
-        "sql": [],
-        "mysql": [],
-        "postgresql": ["postgres"],
-        "mongodb": ["mongo"],
-        "sqlite": [],
-        "oracle": [],
-        "redis": [],
-        "firebase": ["firestore"],
-
-        # Mobile
-        "android": ["android development"],
-        "flutter": [],
-        "dart": [],
-        "react native": ["react-native"],
-        "swift": [],
-        "kotlin": [],
-
-        # DevOps / Cloud
-        "aws": ["amazon web services"],
-        "azure": [],
-        "gcp": ["google cloud"],
-        "docker": [],
-        "kubernetes": ["k8s"],
-        "jenkins": [],
-        "ci/cd": ["cicd"],
-        "nginx": [],
-        "linux": [],
-
-        # Data / AI
-        "machine learning": ["ml"],
-        "artificial intelligence": ["ai"],
-        "nlp": ["natural language processing"],
-        "data analysis": [],
-        "pandas": [],
-        "numpy": [],
-        "tensorflow": [],
-        "pytorch": ["torch"],
-
-        # Tools
-        "git": [],
-        "github": [],
-        "gitlab": [],
-        "jira": [],
-        "postman": [],
-        "swagger": [],
+    matcher = current_taxonomy()["matcher"]
+    found = match_skills(text, matcher)
+    counts = {
+        skill: found[skill]
+        for skill, category in matcher["category"].items()
+        if category != "soft" and found[skill]
     }
 
-    counts = Counter()
-
-    # ---------------------------------
-    # Count skills safely
-    # ---------------------------------
-    for skill, aliases in SKILL_MAP.items():
-        patterns = [skill] + aliases
-
-        for p in patterns:
-            pattern = r"\b" + re.escape(p) + r"\b"
-            matches = len(re.findall(pattern, text))
-            if matches:
-                counts[skill] += matches
-
     if not counts:
         return {}
 
@@ -269,10 +213,17 @@ def extract_skills_rule(text):
     # Sort by relevance (highest first)
     return dict(sorted(skill_scores.items(), key=lambda x: -x[1]))
 
+def safe_json_load(text):
+    try:
+        text = re.sub(r"```json|```", "", text).strip()
+        return json.loads(text)
+    except:
+        return None
+
 # ---------------------------------------------------
 # GEMINI: SKILLS NORMALIZATION
 # ---------------------------------------------------
-def gemini_skills(text, rule_skills):
+def gemini_skills(client, text, rule_skills):
     prompt = f"""
 Extract only TECHNICAL skills from the resume.
 Normalize names (React.js → React).
@@ -287,21 +238,19 @@ Existing skills:
 Format:
 {{"skills":[{{"name":"React","score":90}}]}}
 """
-    r = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=prompt
-    )
-def safe_json_load(text):
-    try:
-        text = re.sub(r"```json|```", "", text).strip()
-        return json.loads(text)
-    except:
-        return None
+    data = safe_json_load(generate(client, prompt)) or {}
+
+    # Same shape as extract_skills_rule: {skill: score}
+    skills = {}
+    for s in data.get("skills") or []:
+        if isinstance(s, dict) and s.get("name"):
+            skills[s["name"]] = int(s.get("score") or 0)
+    return dict(sorted(skills.items(), key=lambda x: -x[1]))
 
 # ---------------------------------------------------
 # GEMINI: PROJECTS (ALL FORMATS)
 # ---------------------------------------------------
-def gemini_projects(text):
+def gemini_projects(client, text):
     prompt = f"""
 Extract ONLY projects (not internships/jobs).
 
@@ -317,29 +266,64 @@ Return JSON ONLY in this format:
 {{"projects":[{{"title":"","description":"","stack":[]}}]}}
 """
 
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=prompt
-    )
-
-    return safe_json_load(response.text)
+    return safe_json_load(generate(client, prompt))
 
 
 # ---------------------------------------------------
 # GEMINI: SUMMARY
 # ---------------------------------------------------
-def gemini_summary(text):
-    r = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=f"Summarize resume in 4 professional bullet points:\n{text[:2000]}"
-    )
-    return r.text.strip()
+def gemini_summary(client, text):
+    return generate(
+        client, f"Summarize resume in 4 professional bullet points:\n{text[:2000]}"
+    ).strip()
+
+# ---------------------------------------------------
+# CONCURRENT GEMINI CALLS
+# ---------------------------------------------------
+# The three prompts are independent, so they go out together and the parse
+# waits for the slowest one instead of the sum of all three. Each call keeps
+# its own fallback: an error, an empty answer or no answer within
+# GEMINI_TIMEOUT_S leaves the rule-based value in place.
+def gemini_enrich(client, calls, timeout=None):
+    timeout = GEMINI_TIMEOUT_S if timeout is None else timeout
+    results = {name: fallback for name, (_, fallback) in calls.items()}
+    answers = {}  # name -> value, or the exception it raised
+
+    def run(name, fn):
+        try:
+            answers[name] = fn(client)
+        except Exception as e:
+            answers[name] = e
+
+    # Daemon threads: a call that never answers is abandoned and does not
+    # hold up interpreter exit (executor workers are joined at exit)
+    threads = {
+        name: threading.Thread(target=run, args=(name, fn), daemon=True)
+        for name, (fn, _) in calls.items()
+    }
+    for thread in threads.values():
+        thread.start()
+    deadline = time.monotonic() + timeout
+    for thread in threads.values():
+        thread.join(max(0.0, deadline - time.monotonic()))
+
+    answered = dict(answers)
+    for name in threads:
+        if name not in answered:
+            print(f"Gemini {name} timed out after {timeout}s", file=sys.stderr)
+        elif isinstance(answered[name], Exception):
+            print(f"Gemini {name} failed: {answered[name]}", file=sys.stderr)
+        elif answered[name]:
+            results[name] = answered[name]
+
+    return results
 
 # ---------------------------------------------------
 # MAIN PARSER
 # ---------------------------------------------------
-def parse_resume(file_path):
+def parse_resume(file_path, client=None):
     text = read_pdf(file_path)
+    client = client or get_client()
 
     name = extract_name(text)
     email = extract_email(text)
@@ -348,10 +332,12 @@ def parse_resume(file_path):
     experience_years = extract_experience(text)
 
     skills_rule = extract_skills_rule(text)
-    skills_ai = gemini_skills(text, skills_rule)
 
-    projects = gemini_projects(text)
-    summary = gemini_summary(text)
+    ai = gemini_enrich(client, {
+        "skills": (lambda c: gemini_skills(c, text, skills_rule), skills_rule),
+        "projects": (lambda c: gemini_projects(c, text), None),
+        "summary": (lambda c: gemini_summary(c, text), ""),
+    })
 
     return {
         "file": file_path,
@@ -360,9 +346,9 @@ def parse_resume(file_path):
         "phone": phone,
         "experience_years": experience_years,
         "education": education,
-        "skills": skills_ai if skills_ai else skills_rule,
-        "projects": projects,
-        "summary": summary
+        "skills": ai["skills"],
+        "projects": ai["projects"],
+        "summary": ai["summary"]
     }
 
 # ---------------------------------------------------
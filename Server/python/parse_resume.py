@@ -1,66 +1,171 @@
+import io
+import os
 import re
 import sys
+import glob
 import json
-import spacy
-import requests
+import base64
+import time
+import cProfile
+import argparse
+import threading
+import multiprocessing
 import pdfplumber
 from datetime import datetime
 from collections import Counter
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from resume_cache import open_cache, file_digest, data_digest, cache_key
+from resume_dedup import open_dedup_index, minhash
+from skill_fuzzy import candidate_phrases, fuzzy_skills, FUZZY_ENABLED, FUZZY_THRESHOLD
+from skill_taxonomy import current_taxonomy, match_skills, resume_skill_keys
+from job_index import get_job_index, match_jobs
+from ollama_client import (
+    generate_sync, scheduler_metrics, share_slots, set_slots,
+    PRIORITIES, PRIORITY_INTERACTIVE, PRIORITY_BULK
+)
+
+# Optional fast PDF backends (pdfplumber stays the fallback)
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
 
-# Load spaCy
-nlp = spacy.load("en_core_web_sm")
+# ---------------------------------------------------
+# spaCy (lazy, NER only)
+# ---------------------------------------------------
+# Only extract_name's fallback needs the model, so it is imported and
+# loaded on first use with every other pipe excluded.
+# PARSER_NO_SPACY=1 never imports spaCy and uses heuristics instead.
+# Batch runs defer the fallback and resolve names together (nlp.pipe):
+# PARSER_NER_BATCH=64       snippets per nlp.pipe call / pending results
+# PARSER_NER_FLUSH_S=2      longest a pending result waits for its batch
+# PARSER_NER_PROCESSES=1    nlp.pipe n_process
+SPACY_MODEL = "en_core_web_sm"
+SPACY_EXCLUDE = ["tok2vec", "tagger", "parser", "attribute_ruler",
+                 "lemmatizer", "senter"]
+NO_SPACY = os.environ.get("PARSER_NO_SPACY") == "1"
+NER_BATCH_SIZE = int(os.environ.get("PARSER_NER_BATCH", "64"))
+NER_FLUSH_S = float(os.environ.get("PARSER_NER_FLUSH_S", "2"))
+NER_PROCESSES = int(os.environ.get("PARSER_NER_PROCESSES", "1"))
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                _nlp = spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDE)
+    return _nlp
 
 # ---------------------------------------------------
 # OLLAMA LLM CLIENT
 # ---------------------------------------------------
-OLLAMA_URL = "http://localhost:11434/api/generate"
+# Streaming, pooled client (see ollama_client.py); the reply ends at the
+# first complete JSON object, and generation is aborted (then retried) at
+# the first character that breaks the JSON grammar.
+# The JSON schema of the requested fields goes out as Ollama's `format`,
+# so the model can only produce a matching object.
+# OLLAMA_FORMAT=0   plain prompting, for Ollama servers before 0.5
 OLLAMA_MODEL = "llama3:8b"
+OLLAMA_FORMAT = os.environ.get("OLLAMA_FORMAT", "1") != "0"
 
-def ollama_call(prompt, temperature=0.1):
+def ollama_call(prompt, temperature=0.1, num_predict=350,
+                priority=PRIORITY_INTERACTIVE, schema=None):
     payload = {
         "model": OLLAMA_MODEL,
         "prompt": prompt,
         "temperature": 0.1,
-        "stream": False,
         "options": {
             "num_ctx": 4096,
-            "num_predict": 350,
+            "num_predict": num_predict,
             "num_thread": 8
         }
     }
-    res = requests.post(OLLAMA_URL, json=payload, timeout=120)
-    res.raise_for_status()
-    return res.json()["response"]
-
-def safe_json_load(raw):
-    # Extract JSON object
-    start = raw.find("{")
-    end = raw.rfind("}")
-    if start == -1 or end == -1:
-        raise ValueError("No JSON object found")
-
-    raw = raw[start:end + 1]
+    if schema and OLLAMA_FORMAT:
+        payload["format"] = schema
+    return generate_sync(payload, priority=priority)
 
-    # Normalize quotes
-    raw = raw.replace("“", '"').replace("”", '"').replace("’", "'")
 
-    # Remove invalid control characters FIRST
-    raw = re.sub(r"[\x00-\x1F\x7F]", "", raw)
-
-    # Fix trailing commas
-    raw = re.sub(r",\s*([}\]])", r"\1", raw)
-
-    # Fix unescaped backslashes
-    raw = re.sub(r'\\(?!["\\/bfnrtu])', r'\\\\', raw)
-
-    return json.loads(raw)
+# ---------------------------------------------------
+# LLM RESUME EXTRACTION (FORMAT-AGNOSTIC, PER FIELD)
+# ---------------------------------------------------
+# field -> (schema line, section it is read from, completion token budget)
+LLM_FIELDS = {
+    "name": ('"name": ""', "header", 20),
+    "email": ('"email": ""', "header", 20),
+    "phone": ('"phone": ""', "header", 20),
+    "skills": ('"skills": []', "skills", 80),
+    "experience_years": ('"experience_years": 0', "experience", 10),
+    "education": ('"education": []', "education", 60),
+    "projects": (
+        '"projects": [\n    {\n      "title": "",\n      "description": "",'
+        '\n      "tech_stack": []\n    }\n  ]',
+        "projects", 220
+    ),
+}
+LLM_CONTEXT_CHARS = 4000
+LLM_MAX_PREDICT = 350
+
+STRING_LIST = {"type": "array", "items": {"type": "string"}}
+LLM_FIELD_SCHEMAS = {
+    "name": {"type": "string"},
+    "email": {"type": "string"},
+    "phone": {"type": "string"},
+    "skills": STRING_LIST,
+    "experience_years": {"type": "number"},
+    "education": STRING_LIST,
+    "projects": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string"},
+                "description": {"type": "string"},
+                "tech_stack": STRING_LIST,
+            },
+            "required": ["title", "description", "tech_stack"],
+        },
+    },
+}
+JSON_TYPES = {"string": str, "array": list, "number": (int, float)}
 
+def llm_schema(fields):
+    return {
+        "type": "object",
+        "properties": {f: LLM_FIELD_SCHEMAS[f] for f in fields},
+        "required": list(fields),
+    }
 
+def llm_context(text, fields):
+    # Only the sections the requested fields live in; the full text is used
+    # when one of those sections was not found (that is often why it failed)
+    index = index_sections(text)
+    parts = []
+    for section in dict.fromkeys(LLM_FIELDS[f][1] for f in fields):
+        body = section_text(index, section)
+        if not body and section == "header":
+            body = text[:500]
+        if not body:
+            return text[:LLM_CONTEXT_CHARS]
+        parts.append(f"{section.upper()}\n{body}")
+
+    return "\n\n".join(parts)[:LLM_CONTEXT_CHARS]
+
+def llm_extract_resume(text, fields=None, priority=PRIORITY_INTERACTIVE):
+    fields = [f for f in (fields or LLM_FIELDS) if f in LLM_FIELDS]
+    schema = ",\n  ".join(LLM_FIELDS[f][0] for f in fields)
+    num_predict = min(LLM_MAX_PREDICT, sum(LLM_FIELDS[f][2] for f in fields))
 
-# ---------------------------------------------------
-# LLM RESUME EXTRACTION (FORMAT-AGNOSTIC)
-# ---------------------------------------------------
-def llm_extract_resume(text):
     prompt = f"""
 You are a resume parser.
 
@@ -71,19 +176,7 @@ NO extra text.
 
 STRICT SCHEMA:
 {{
-  "name": "",
-  "email": "",
-  "phone": "",
-  "skills": [],
-  "experience_years": 0,
-  "education": [],
-  "projects": [
-    {{
-      "title": "",
-      "description": "",
-      "tech_stack": []
-    }}
-  ]
+  {schema}
 }}
 
 Rules:
@@ -94,51 +187,38 @@ Rules:
 - If missing data, return empty values
 
 Resume Text:
-\"\"\"{text[:4000]}\"\"\"
+\"\"\"{llm_context(text, fields)}\"\"\"
 """
-    raw = ollama_call(prompt)
-    match = re.search(r"\{[\s\S]*\}", raw)
-    if not match:
-        raise ValueError("No JSON found in LLM response")
-    json_text = match.group()
+    # The client returns exactly one grammar-checked object (or raises)
+    raw = ollama_call(
+        prompt, num_predict=num_predict, priority=priority, schema=llm_schema(fields)
+    )
     try:
-        return safe_json_load(json_text)
-    except Exception as e:
+        result = json.loads(raw, strict=False)
+    except ValueError as e:
+        # Only an unfinished object gets here (num_predict ran out)
         raise ValueError(f"Invalid LLM JSON: {e}")
 
-# ---------------------------------------------------
-# split sections
-# ---------------------------------------------------
-def split_sections(text):
-    
-    section_map = {}
-    current = "header"
-    section_map[current] = []
-
-    for line in text.split("\n"):
-        clean = line.strip()
-        if not clean:
+    # Drop anything the model added beyond what was asked for, or of the
+    # wrong type (models that ignore `format`)
+    fields_out = {}
+    for f in fields:
+        value, schema = result.get(f), LLM_FIELD_SCHEMAS[f]
+        if not isinstance(value, JSON_TYPES[schema["type"]]) or isinstance(value, bool):
             continue
-        
-
-        # Detect section headings (uppercase or title-case)
-        if (
-            clean.isupper()
-            or re.fullmatch(r"[A-Z][A-Za-z /&-]{3,}", clean)
-        ) and len(clean.split()) <= 6:
-            current = clean.lower()
-            section_map[current] = []
-        else:
-            section_map[current].append(clean)
-        if len(section_map) > 40:
-            break
-
+        if schema is STRING_LIST:
+            value = [v for v in value if isinstance(v, str)]
+        fields_out[f] = value
+    return fields_out
 
-    # Join lines
-    return {k: "\n".join(v) for k, v in section_map.items()}
 # ---------------------------------------------------
-# Smarter Section Mapping
+# SECTION INDEX (single pass, offsets into the text)
 # ---------------------------------------------------
+# Headings are found once and every section is kept as (start, end)
+# offsets into the original text, so nothing is re-split or re-joined.
+# Same results as the old split-into-dict code: a repeated heading keeps
+# only its last body, a section kind is the first heading (in document
+# order) that resolves to it, and at most MAX_SECTIONS headings are read.
 SECTION_ALIASES = {
     "experience": ["experience", "internships", "work experience"],
     "projects": ["projects", "challenges", "blogs"],
@@ -146,17 +226,79 @@ SECTION_ALIASES = {
     "education": ["education"],
     "summary": ["summary", "career objective", "objective"],
 }
-def get_section(sections, keys):
-    for k in sections:
-        for alias in keys:
-            if alias in k:
-                return sections[k]
-    return ""
+
+HEADING_RE = re.compile(r"[A-Z][A-Za-z /&-]{3,}")
+# Lines that could pass is_heading: no lowercase ASCII at all, or
+# title-case words only, padded by any whitespace (\xa0 too) but "\n".
+# Body lines are skipped inside the regex engine.
+HEADING_CANDIDATE_RE = re.compile(
+    r"^(?:[^a-z\n]+|[^\S\n]*[A-Z](?:[A-Za-z/&\-]|[^\S\n])*)$", re.M
+)
+MAX_SECTIONS = 40
+
+# heading (lowercased) -> section kinds it belongs to. Bounded: heading-like
+# lines include names and company names, and --serve workers live long.
+@lru_cache(maxsize=4096)
+def heading_kinds(heading):
+    return tuple(
+        kind for kind, aliases in SECTION_ALIASES.items()
+        if any(alias in heading for alias in aliases)
+    )
+
+def is_heading(clean):
+    # Uppercase or title-case line of at most 6 words
+    return (
+        (clean.isupper() or HEADING_RE.fullmatch(clean))
+        and len(clean.split()) <= 6
+    )
+
+def index_sections(text):
+    # {"text": text,
+    #  "headings": {heading: (start, end), ...}   # body offsets
+    #  "kinds": {"skills": [(start, end)], "header": [...], ...}}
+    headings = {"header": (0, len(text))}
+    current = "header"
+    for m in HEADING_CANDIDATE_RE.finditer(text):
+        clean = m.group().strip()
+        if clean and is_heading(clean):
+            headings[current] = (headings[current][0], m.start())
+            # Re-assigning a repeated heading keeps its first position
+            current = clean.lower()
+            headings[current] = (m.end() + 1, len(text))
+            if len(headings) > MAX_SECTIONS:
+                headings[current] = (m.end() + 1, m.end() + 1)
+                break
+
+    kinds = {}
+    for heading, span in headings.items():
+        if heading == "header":
+            kinds["header"] = [span]
+            continue
+        for kind in heading_kinds(heading):
+            kinds.setdefault(kind, [span])
+
+    return {"text": text, "headings": headings, "kinds": kinds}
+
+def section_text(index, kind):
+    # Only the spans of one kind are materialised, as stripped non-blank lines
+    text = index["text"]
+    lines = []
+    for s, e in index["kinds"].get(kind, ()):
+        lines.extend(l.strip() for l in text[s:e].split("\n"))
+    return "\n".join(l for l in lines if l)
 
 # ---------------------------------------------------
 # MERGE RULE-BASED + LLM RESULTS
 # ---------------------------------------------------
-def merge_results(rule, llm):
+def merge_results(rule, llm, prefer_llm=()):
+    # prefer_llm: fields the LLM was asked for because the rule value was
+    # doubtful; a non-empty LLM answer replaces it (skills are merged).
+    # A 0 from an experience section without dates is not doubtful, so
+    # the LLM is never asked to replace it.
+    rule = dict(rule)
+    for f in prefer_llm:
+        if f != "skills" and llm.get(f):
+            rule[f] = 0 if f == "experience_years" else None
     return {
         "name": rule["name"] or llm.get("name"),
         "email": rule["email"] or llm.get("email"),
@@ -178,21 +320,216 @@ def merge_results(rule, llm):
     }
 
 # ---------------------------------------------------
-# READ PDF
+# READ PDF (pluggable backends, lazy pages)
 # ---------------------------------------------------
-def read_pdf(file_path):
-    text = ""
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            t = page.extract_text()
+# PDF_BACKEND=auto|pymupdf|pypdfium2|pdfplumber
+#                           auto = pdfplumber, the text the extraction rules
+#                           are written against. PyMuPDF and pypdfium2 are
+#                           much faster but lay text out differently (dates
+#                           and section ends move into projects), so they
+#                           are opt-in.
+# PDF_MAX_PAGES=4           page budget (0 = read every page)
+# PDF_MAX_CHARS=20000       character budget (0 = no limit)
+#                           Pages past the budgets are skipped once the
+#                           required sections were seen; the result then
+#                           carries "truncated": true.
+# PDF_PAGE_WORKERS=N        extract long PDFs with N processes (0 = serial).
+#                           Only with PDF_MAX_PAGES=0 and PDF_MAX_CHARS=0:
+#                           budgeted reads stay lazy and serial.
+# PDF_PARALLEL_MIN_PAGES=8  page count from which the parallel mode kicks in
+PDF_BACKEND = os.environ.get("PDF_BACKEND", "auto")
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "4"))
+PDF_MAX_CHARS = int(os.environ.get("PDF_MAX_CHARS", "20000"))
+PDF_PAGE_WORKERS = int(os.environ.get("PDF_PAGE_WORKERS", "0"))
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "8"))
+
+# Past the budget, pages are still pulled until these sections are seen
+REQUIRED_SECTIONS = ("skills", "experience", "education")
+
+# A PDF source is a file path or the document's bytes (uploads and stdin
+# are parsed straight from memory, never written to disk)
+def _is_bytes(source):
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+def _pymupdf_open(source):
+    if _is_bytes(source):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+# Backends yield page texts lazily, keeping the document open in between
+def _pymupdf_pages(source, pages=None):
+    with _pymupdf_open(source) as doc:
+        for i in pages if pages is not None else range(doc.page_count):
+            yield doc[i].get_text()
+
+def _pymupdf_count(source):
+    with _pymupdf_open(source) as doc:
+        return doc.page_count
+
+def _pdfium_pages(source, pages=None):
+    pdf = pdfium.PdfDocument(source)
+    try:
+        for i in pages if pages is not None else range(len(pdf)):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+            page.close()
+            yield text
+    finally:
+        pdf.close()
+
+def _pdfium_count(source):
+    pdf = pdfium.PdfDocument(source)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+def _pdfplumber_open(source):
+    return pdfplumber.open(io.BytesIO(source) if _is_bytes(source) else source)
+
+def _pdfplumber_pages(source, pages=None):
+    with _pdfplumber_open(source) as pdf:
+        for i in pages if pages is not None else range(len(pdf.pages)):
+            yield pdf.pages[i].extract_text()
+
+def _pdfplumber_count(source):
+    with _pdfplumber_open(source) as pdf:
+        return len(pdf.pages)
+
+# name -> (available, page generator, count pages)
+PDF_BACKENDS = {
+    "pymupdf": (fitz is not None, _pymupdf_pages, _pymupdf_count),
+    "pypdfium2": (pdfium is not None, _pdfium_pages, _pdfium_count),
+    "pdfplumber": (True, _pdfplumber_pages, _pdfplumber_count),
+}
+
+def resolve_pdf_backend(name=None):
+    name = name or PDF_BACKEND
+    if name == "auto":
+        return "pdfplumber"
+    if name not in PDF_BACKENDS or not PDF_BACKENDS[name][0]:
+        raise ValueError(f"PDF backend not available: {name}")
+    return name
+
+# A bad PDF_BACKEND would otherwise fail at import (the cache version
+# resolves it) and crash-loop every worker
+try:
+    resolve_pdf_backend()
+except ValueError as e:
+    print(f"{e}; using pdfplumber", file=sys.stderr)
+    PDF_BACKEND = "auto"
+
+# Per-backend extraction stats for this process: calls, pages, ms
+PDF_TIMINGS = {}
+
+def _record_pdf_timing(backend, pages, seconds):
+    stats = PDF_TIMINGS.setdefault(backend, {"calls": 0, "pages": 0, "ms": 0.0})
+    stats["calls"] += 1
+    stats["pages"] += pages
+    stats["ms"] += seconds * 1000
+
+_page_executor = None
+_page_executor_lock = threading.Lock()
+
+def _extract_page_range(backend, source, start, stop):
+    return list(PDF_BACKENDS[backend][1](source, range(start, stop)))
+
+def _read_all_pages(backend, source):
+    global _page_executor
+    _, pages, count = PDF_BACKENDS[backend]
+
+    # Daemonic processes (batch pool workers) cannot fork page workers
+    if PDF_PAGE_WORKERS > 1 and not multiprocessing.current_process().daemon:
+        total = count(source)
+        if total >= PDF_PARALLEL_MIN_PAGES:
+            if _page_executor is None:
+                # --serve threads may get here together; one pool only
+                with _page_executor_lock:
+                    if _page_executor is None:
+                        _page_executor = ProcessPoolExecutor(PDF_PAGE_WORKERS)
+            step = -(-total // PDF_PAGE_WORKERS)
+            futures = [
+                _page_executor.submit(
+                    _extract_page_range, backend, source, i, min(i + step, total)
+                )
+                for i in range(0, total, step)
+            ]
+            return [t for f in futures for t in f.result()]
+
+    return list(pages(source))
+
+def _sections_found(text, wanted):
+    return set(index_sections(text)["kinds"]) & set(wanted)
+
+# Returns (page texts, truncated)
+def _read_budgeted_pages(backend, source, max_pages, max_chars, required):
+    texts = []
+    chars = 0
+    missing = set(required)
+    truncated = False
+
+    pages = PDF_BACKENDS[backend][1](source)
+    try:
+        for t in pages:
+            over_budget = (
+                (max_pages and len(texts) >= max_pages)
+                or (max_chars and chars >= max_chars)
+            )
+            if over_budget and not missing:
+                truncated = True
+                break
+
+            texts.append(t)
             if t:
-                text += t + "\n"
+                chars += len(t)
+                missing -= _sections_found(t, missing)
+    finally:
+        pages.close()
+
+    return texts, truncated
+
+def read_pdf(source, backend=None, max_pages=None, max_chars=None,
+             required_sections=REQUIRED_SECTIONS, stats=None):
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    max_chars = PDF_MAX_CHARS if max_chars is None else max_chars
+
+    primary = resolve_pdf_backend(backend)
+    order = [primary] + (["pdfplumber"] if primary != "pdfplumber" else [])
+
+    text = ""
+    for name in order:
+        start = time.perf_counter()
+        truncated = False
+        try:
+            if max_pages or max_chars:
+                pages, truncated = _read_budgeted_pages(
+                    name, source, max_pages, max_chars, required_sections
+                )
+            else:
+                pages = _read_all_pages(name, source)
+        except Exception:
+            # pdfplumber is the last resort: let its error through
+            if name == "pdfplumber":
+                raise
+            pages = []
+        _record_pdf_timing(name, len(pages), time.perf_counter() - start)
+
+        text = "".join(t + "\n" for t in pages if t)
+        if text.strip():
+            break
+
+    if stats is not None:
+        stats["backend"] = name
+        stats["pages"] = len(pages)
+        stats["truncated"] = truncated
     return text
 
 # ---------------------------------------------------
 # NAME EXTRACTION (Improved for all formats)
 # ---------------------------------------------------
-def extract_name(text):
+def extract_name(text, spacy_fallback=True):
     # Preprocess text: remove extra spaces
     lines = [l.strip() for l in text.split("\n") if l.strip()]
     ignored_words = {"resume", "curriculum", "vitae", "cv", "profile"}
@@ -207,11 +544,67 @@ def extract_name(text):
                 # Capitalize first letters for consistency
                 return " ".join(w.capitalize() for w in words)
 
+    if NO_SPACY:
+        return heuristic_name(text)
+    if not spacy_fallback:
+        return None
+
     # SpaCy fallback (first 500 chars)
-    doc = nlp(text[:500])
+    return person_name(get_nlp()(name_snippet(text)))
+
+def name_snippet(text):
+    return text[:500]
+
+def person_name(doc):
     for ent in doc.ents:
         if ent.label_ == "PERSON" and 2 <= len(ent.text.split()) <= 5:
             return ent.text.strip()
+    return None
+
+# Names for many snippets in one pass: nlp.pipe batches the documents
+# (and with n_process > 1 spreads them over processes), far cheaper per
+# document than one nlp() call each
+def resolve_names(snippets, batch_size=None, n_process=None):
+    if not snippets:
+        return []
+    docs = get_nlp().pipe(
+        snippets,
+        batch_size=batch_size or NER_BATCH_SIZE,
+        n_process=n_process or NER_PROCESSES,
+    )
+    return [person_name(doc) for doc in docs]
+
+NAME_LABEL_RE = re.compile(r"\bname\s*[:\-]\s*([A-Za-z][A-Za-z .'-]{2,60})", re.I)
+CAPITALIZED_RUN_RE = re.compile(r"\b([A-Z][a-z]+(?:[ \t]+[A-Z][a-z]+){1,3})\b")
+NAME_STOPWORDS = {
+    "resume", "curriculum", "vitae", "cv", "profile", "summary", "objective",
+    "career", "experience", "education", "skills", "projects", "contact",
+    "email", "phone", "address", "university", "college", "school",
+    "engineer", "developer", "software", "technologies", "institute",
+}
+
+def heuristic_name(text):
+    # No-spaCy fallback: "Name: ..." label, then a run of 2-4 capitalized
+    # words near the top, then the email's local part
+    head = text[:500]
+
+    m = NAME_LABEL_RE.search(head)
+    if m:
+        words = [w for w in m.group(1).split() if w.replace("'", "").isalpha()]
+        if 2 <= len(words) <= 5:
+            return " ".join(w.capitalize() for w in words)
+
+    for m in CAPITALIZED_RUN_RE.finditer(head):
+        words = m.group(1).split()
+        if not any(w.lower() in NAME_STOPWORDS for w in words):
+            return " ".join(words)
+
+    email = extract_email(head)
+    if email:
+        parts = [p for p in re.split(r"[._\-]", email.split("@")[0])
+                 if p.isalpha() and len(p) > 1]
+        if 2 <= len(parts) <= 4:
+            return " ".join(p.capitalize() for p in parts)
 
     return None
 
@@ -219,11 +612,13 @@ def extract_name(text):
 # ---------------------------------------------------
 # EMAIL & PHONE (Robust patterns)
 # ---------------------------------------------------
-def extract_email(text):
-    # More reliable industry-grade regex
-    pattern = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
+# More reliable industry-grade regex. The lookbehind makes a match start
+# only at the beginning of a run of local-part characters; without it a
+# long run with no "@" is rescanned from every offset (quadratic).
+EMAIL_RE = re.compile(r"(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
 
-    emails = re.findall(pattern, text)
+def extract_email(text):
+    emails = EMAIL_RE.findall(text)
     if not emails:
         return None
 
@@ -282,105 +677,37 @@ def extract_phone(text):
 
 
 # ---------------------------------------------------
-# SKILLS & RATINGS (Expanded IT skills)
+# SKILLS & RATINGS
 # ---------------------------------------------------
-TECH_SKILLS = {
-    "frontend": {
-        "html": ["html5"],
-        "css": ["css3"],
-        "javascript": ["js"],
-        "typescript": ["ts"],
-        "react": ["reactjs", "react.js"],
-        "angular": [],
-        "vue": ["vuejs"],
-        "bootstrap": [],
-        "tailwind": ["tailwindcss"],
-        "jquery": []
-    },
-
-    "backend": {
-        "node": ["nodejs", "node.js"],
-        "express": ["expressjs", "express.js"],
-        "php": [],
-        "python": [],
-        "django": [],
-        "flask": [],
-        "java": ["core java", "advanced java"],
-        "spring": ["spring boot"],
-        "c": [],
-        "c++": ["cpp"],
-        "c#": ["csharp"],
-        "golang": ["go"],
-        "ruby": [],
-        "rails": ["ruby on rails"]
-    },
-
-    "databases": {
-        "mysql": [],
-        "postgresql": ["postgres"],
-        "mongodb": ["mongo"],
-        "sqlserver": ["mssql"],
-        "sql": [],
-        "oracle": [],
-        "redis": []
-    },
-
-    "devops_cloud": {
-        "docker": [],
-        "kubernetes": ["k8s"],
-        "aws": ["amazon web service"],
-        "azure": [],
-        "gcp": ["google cloud"],
-        "jenkins": [],
-        "ci/cd": ["cicd"],
-        "terraform": [],
-        "ansible": [],
-        "prometheus": []
-    },
-
-    "mobile": {
-        "react native": ["react-native"],
-        "flutter": [],
-        "swift": [],
-        "kotlin": []
-    },
-
-    "data_ml": {
-        "pandas": [],
-        "numpy": [],
-        "scikit-learn": ["sklearn"],
-        "tensorflow": [],
-        "pytorch": ["torch"],
-        "spark": ["pyspark"],
-        "hadoop": [],
-        "ml": ["machine learning"],
-        "ai": ["artificial intelligence"],
-        "nlp": ["natural language processing"]
-    },
-
-    "tools": {
-        "git": [],
-        "github": [],
-        "gitlab": [],
-        "jira": [],
-        "confluence": [],
-        "linux": []
-    }
-}
+# Skills, aliases and soft skills live in skills_taxonomy.json, shared with
+# parse_resume-gemini.py and job_index.py. The compiled matcher is loaded
+# from skill_taxonomy and hot-reloaded when the file changes.
+
+# Near-miss spellings ("Postgre SQL", "Scikit Learn", "Postgress") in the
+# skills section, scored against the tech taxonomy
+def fuzzy_skill_counts(text, taxonomy):
+    counts = Counter()
+    phrases = candidate_phrases(text)
+    for phrase, skill in fuzzy_skills(phrases, taxonomy["fuzzy"]).items():
+        # Only what the exact aliases missed in that phrase
+        if skill and not match_skills(phrase, taxonomy["matcher"])[skill]:
+            counts[skill] += 1
+    return counts
 
 def extract_skills(text):
+    taxonomy = current_taxonomy()
     text = (text or "").lower()
-    skill_counts = Counter()
-
-    # --- TECH SKILLS ---
-    for category, skills in TECH_SKILLS.items():
-        for skill, aliases in skills.items():
-            patterns = [skill] + aliases
-            for p in patterns:
-                pattern = r"\b" + re.escape(p) + r"\b"
-                matches = len(re.findall(pattern, text))
-                if matches:
-                    skill_counts[skill] += matches
+    found = match_skills(text, taxonomy["matcher"])
+    if taxonomy["fuzzy"] and text:
+        found.update(fuzzy_skill_counts(text, taxonomy))
+    category = taxonomy["matcher"]["category"]
+
+    # --- TECH SKILLS --- (taxonomy order, as the scores are sorted stably)
+    skill_counts = {
+        skill: found[skill]
+        for skill in category
+        if category[skill] != "soft" and found[skill]
+    }
 
     max_count = max(skill_counts.values(), default=1)
 
@@ -390,14 +717,8 @@ def extract_skills(text):
     }
 
     # --- SOFT SKILLS ---
-    SOFT_SKILLS = [
-        "leadership", "communication", "problem solving",
-        "quick learner", "collaboration", "time management",
-        "project management", "email marketing"
-    ]
-
-    for s in SOFT_SKILLS:
-        if re.search(r"\b" + re.escape(s) + r"\b", text):
+    for s in taxonomy["soft"]:
+        if found[s]:
             skill_scores.setdefault(s, 40)
 
     return dict(sorted(skill_scores.items(), key=lambda x: -x[1]))
@@ -406,90 +727,83 @@ def extract_skills(text):
 # EXPERIENCE EXTRACTION (Years & Months)
 # ---------------------------------------------------
 
-def extract_experience(text):
-    import re
-    from datetime import datetime
+MONTH_NUMBERS = {}
+for _i, _name in enumerate(
+    ["january", "february", "march", "april", "may", "june", "july",
+     "august", "september", "october", "november", "december"], 1
+):
+    MONTH_NUMBERS[_name] = MONTH_NUMBERS[_name[:3]] = _i
+MONTH_NUMBERS["sept"] = 9
+
+# "Jan 2020 - Mar 2022", "2019 to 2021", "Sept. 2021 – Present", ...
+# The month word is optional and only counts if it is in MONTH_NUMBERS.
+DATE_RANGE_RE = re.compile(
+    r"\b(?:(?P<sm>[A-Za-z]{3,9})\.?,?\s+)?(?P<sy>(?:19|20)\d{2})"
+    r"\s*(?:[-–—]+|to|till|until)\s*"
+    r"(?:(?:\d{1,2}\s+)?(?:(?P<em>[A-Za-z]{3,9})\.?,?\s+)?(?P<ey>(?:19|20)\d{2})\b"
+    r"|(?P<now>present|current|now|today)\b)",
+    re.IGNORECASE,
+)
+MAX_SPAN_MONTHS = 120
+# Any year at all: an experience section with one but no parsed range
+# holds dates the rules could not read
+YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+
+def _month_index(year, month_word):
+    # Months since year 0; a bare year counts from January
+    return int(year) * 12 + MONTH_NUMBERS.get((month_word or "").lower(), 1) - 1
+
+def _format_month(index):
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+def date_spans(text, today=None):
+    # Every plausible date range as [start, end) month indexes, in text order
+    today = today or datetime.now()
+    now_index = today.year * 12 + today.month - 1
+
+    spans = []
+    for m in DATE_RANGE_RE.finditer(text):
+        start = _month_index(m.group("sy"), m.group("sm"))
+        end = now_index if m.group("now") else _month_index(m.group("ey"), m.group("em"))
+        if 1 <= end - start <= MAX_SPAN_MONTHS:
+            # Leave out a leading word that turned out not to be a month
+            month = m.group("sm")
+            begin = m.start("sm" if month and month.lower() in MONTH_NUMBERS else "sy")
+            spans.append((start, end, text[begin:m.end()]))
+    return spans
+
+def merge_spans(spans):
+    # Interval union, so overlapping / concurrent roles count once
+    merged = []
+    for start, end, _ in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
 
+def experience_timeline(text, today=None):
+    spans = date_spans(text or "", today)
+    merged = merge_spans(spans)
+    return {
+        "months": sum(end - start for start, end in merged),
+        "spans": [
+            {
+                "text": raw,
+                "start": _format_month(start),
+                "end": _format_month(end),
+                "months": end - start,
+            }
+            for start, end, raw in spans
+        ],
+        "merged": [(_format_month(s), _format_month(e)) for s, e in merged],
+    }
+
+def extract_experience(text):
     if not text:
         return 0.0
-
-    # ----------------------------
-    # Normalize text
-    # ----------------------------
-    t = text.replace("–", "-").replace("—", "-")
-
-    # Replace Present / Current
-    t = re.sub(
-        r"\b(present|current)\b",
-        datetime.now().strftime("%b %Y"),
-        t,
-        flags=re.IGNORECASE
-    )
-
-    total_months = 0
-    used = set()
-
-    # ----------------------------
-    # YEAR-ONLY RANGES (2020 - 2023)
-    # ----------------------------
-    year_pairs = re.findall(
-        r"\b((?:19|20)\d{2})\s*[-to]+\s*((?:19|20)\d{2})\b",
-        t,
-        flags=re.IGNORECASE
-    )
-
-    for y1, y2 in year_pairs:
-        key = (y1, y2)
-        if key in used:
-            continue
-        used.add(key)
-
-        diff = int(y2) - int(y1)
-        if 0 < diff <= 10:
-            total_months += diff * 12
-
-    # ----------------------------
-    # MONTH + YEAR RANGES
-    # ----------------------------
-    month = (
-        r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec|"
-        r"January|February|March|April|May|June|July|August|"
-        r"September|October|November|December)"
-    )
-
-    date = rf"(?:\d{{1,2}}\s+{month}\s+\d{{4}}|{month}\s+\d{{4}})"
-
-    pairs = re.findall(
-        rf"({date})\s*[-to]+\s*({date})",
-        t,
-        flags=re.IGNORECASE
-    )
-
-    def parse(d):
-        d = d.replace(",", "").strip()
-        for fmt in ("%d %b %Y", "%d %B %Y", "%b %Y", "%B %Y"):
-            try:
-                return datetime.strptime(d, fmt)
-            except ValueError:
-                pass
-        return None
-
-    for s_raw, e_raw in pairs:
-        key = (s_raw, e_raw)
-        if key in used:
-            continue
-        used.add(key)
-
-        s = parse(s_raw)
-        e = parse(e_raw)
-        if not s or not e:
-            continue
-
-        months = (e.year - s.year) * 12 + (e.month - s.month)
-        if 1 <= months <= 120:
-            total_months += months
-
-    return round(total_months / 12, 2)
+    merged = merge_spans(date_spans(text))
+    return round(sum(end - start for start, end in merged) / 12, 2)
 
 # ---------------------------------------------------
 # EDUCATION
@@ -575,154 +889,130 @@ def extract_education(text):
 # ---------------------------------------------------
 # PROJECTS
 # ---------------------------------------------------
+# Compiled once; everything below is a single pass over the lines
+PROJECT_START_RE = re.compile(r"PROJECTS?|PROJECT SECTION", re.I)
+PROJECT_END_RE = re.compile(
+    r"EXPERIENCE|INTERNSHIPS|WORK EXPERIENCE|EDUCATION|SKILLS|CERTIFICATION", re.I
+)
+NUMBERED_TITLE_RE = re.compile(r"\d+[\).]?\s*(.+)")
+TITLE_LABEL_RE = re.compile(r"^title:\s*", re.I)
+MULTI_SPACE_RE = re.compile(r"\s{2,}")
+STACK_SPLIT_RE = re.compile(r"[,\|/]")
+BULLET_RE = re.compile(r"^[•\-–]\s*")
+
+STACK_LABELS = ("language used", "languages used", "tech stack", "technologies")
+
+INVALID_PROJECT_TITLES = frozenset({
+    "projects have been completed",
+    "responsibilities",
+    "roles and responsibilities",
+    "summary",
+    "profile",
+    "experience",
+    "education",
+    "skills",
+    "certifications",
+})
+
+def locate_projects(text):
+    # Text between the first "project(s)" keyword and the next section
+    # keyword. Two forward scans instead of a lazy DOTALL match, so the
+    # cost stays linear however noisy the text is.
+    start = PROJECT_START_RE.search(text)
+    if not start:
+        return None
+
+    body = start.end()
+    if body >= len(text):
+        return ""
+    end = PROJECT_END_RE.search(text, body + 1)
+    return text[body:end.start() if end else len(text)]
+
+def _project_title(title):
+    title = TITLE_LABEL_RE.sub("", title.strip())
+    return MULTI_SPACE_RE.sub(" ", title)
+
 def parse_projects(text):
     if not text:
         return []
 
-    # ------------------------------------------
-    # STEP 1: Detect whether text is full resume
-    # or already a project-like section
-    # ------------------------------------------
-    if re.search(r"PROJECTS?|PROJECT SECTION", text, re.IGNORECASE):
-        # Full resume text → extract project section
-        proj_match = re.search(
-            r"(PROJECTS?|PROJECT SECTION)(.+?)(EXPERIENCE|INTERNSHIPS|WORK EXPERIENCE|EDUCATION|SKILLS|CERTIFICATION|$)",
-            text,
-            flags=re.IGNORECASE | re.DOTALL
-        )
-        if not proj_match:
-            return []
-        proj_section = proj_match.group(2)
-    else:
-        # Already a section (blogs / challenges / projects)
+    # Full resume text → cut out the project section; otherwise the text
+    # is already a section (blogs / challenges / projects)
+    proj_section = locate_projects(text)
+    if proj_section is None:
         proj_section = text
 
-    lines = [l.strip() for l in proj_section.split("\n") if l.strip()]
-
     projects = []
-    current = {
-        "title": None,
-        "description": [],
-        "stack_text": "",
-        "stack": []
-    }
+    title, description, stack_text = None, [], ""
 
-    # ------------------------------------------
-    # Helper: save current project
-    # ------------------------------------------
     def save_project():
-        title_raw = current.get("title")
-        if not title_raw:
+        if not title:
             return
 
-        # ----------------------------
-        # Clean & normalize title
-        # ----------------------------
-        title = title_raw.strip()
-        title = re.sub(r"^title:\s*", "", title, flags=re.I)
-        title = re.sub(r"\s{2,}", " ", title)
-
-        INVALID_PROJECT_TITLES = {
-            "projects have been completed",
-            "responsibilities",
-            "roles and responsibilities",
-            "summary",
-            "profile",
-            "experience",
-            "education",
-            "skills",
-            "certifications",
-        }
-
-        if title.lower().rstrip(".") in INVALID_PROJECT_TITLES:
+        clean = _project_title(title)
+        if clean.lower().rstrip(".") in INVALID_PROJECT_TITLES:
             return
 
-        # ----------------------------
-        # Clean description
-        # ----------------------------
-        desc = " ".join(current["description"]).strip()
+        desc = " ".join(description).strip()
 
         # ❌ Reject empty garbage projects
-        if not desc and not current["stack_text"]:
+        if not desc and not stack_text:
             return
 
-        # ----------------------------
-        # Clean & normalize tech stack
-        # ----------------------------
         stack = []
-        if current["stack_text"]:
+        if stack_text:
             stack = sorted({
                 s.strip().lower()
-                for s in re.split(r"[,\|/]", current["stack_text"])
+                for s in STACK_SPLIT_RE.split(stack_text)
                 if s.strip()
             })
 
-        # ----------------------------
-        # Save project
-        # ----------------------------
         projects.append({
-            "title": title,
+            "title": clean,
             "description": desc,
-            "language_used": current["stack_text"].strip(),
+            "language_used": stack_text.strip(),
             "stack": stack
         })
 
     # ------------------------------------------
-    # STEP 2: Parse lines flexibly
+    # Line state machine: each line either starts a project (numbered,
+    # "Title:" or standalone title), sets its stack, or extends its
+    # description
     # ------------------------------------------
-    for line in lines:
+    for line in proj_section.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
         lower = line.lower()
 
         # CASE A: Numbered title
         # "1) Food Ordering System"
-        m = re.match(r"\d+[\).]?\s*(.+)", line)
+        m = NUMBERED_TITLE_RE.match(line)
         if m and len(m.group(1).split()) <= 6:
             save_project()
-            current = {
-                "title": m.group(1).strip(),
-                "description": [],
-                "stack_text": "",
-                "stack": []
-            }
+            title, description, stack_text = m.group(1).strip(), [], ""
             continue
 
         # CASE B: Explicit title label
         if lower.startswith("title:"):
             save_project()
-            current = {
-                "title": line.split(":", 1)[1].strip(),
-                "description": [],
-                "stack_text": "",
-                "stack": []
-            }
+            title, description, stack_text = line.split(":", 1)[1].strip(), [], ""
             continue
 
         # CASE C: Tech / language used
-        if any(k in lower for k in ["language used", "languages used", "tech stack", "technologies"]):
-            current["stack_text"] = line.split(":", 1)[-1].strip()
+        if any(k in lower for k in STACK_LABELS):
+            stack_text = line.split(":", 1)[-1].strip()
             continue
 
         # CASE D: Description label
         if lower.startswith("description:"):
-            current["description"].append(line.split(":", 1)[1].strip())
+            description.append(line.split(":", 1)[1].strip())
             continue
 
         # CASE E: Standalone title (creative resumes)
         # e.g. "NewslettrAI", "Timezone Bot"
-        INVALID_PROJECT_TITLES = {
-            "projects have been completed",
-            "responsibilities",
-            "roles and responsibilities",
-            "summary",
-            "profile",
-            "experience",
-            "education",
-            "skills",
-            "certifications",
-        }
-
-        if current["title"] is None:
-            clean_title = line.strip().lower().rstrip(".")
+        if title is None:
+            clean_title = lower.rstrip(".")
 
             # ❌ Reject sentences & generic phrases
             if (
@@ -737,26 +1027,13 @@ def parse_projects(text):
             # ✔ Accept real project titles only
             if 1 <= len(line.split()) <= 5:
                 save_project()
-                current = {
-                    "title": line.strip(),
-                    "description": [],
-                    "stack_text": "",
-                    "stack": []
-                }
-                continue
-
+                title, description, stack_text = line, [], ""
+            continue
 
         # CASE F: Bullet or paragraph description
-        if current["title"]:
-            current["description"].append(
-                re.sub(r"^[•\-–]\s*", "", line)
-            )
+        description.append(BULLET_RE.sub("", line))
 
-    # ------------------------------------------
-    # Save last project
-    # ------------------------------------------
     save_project()
-
     return projects
 
 
@@ -766,106 +1043,759 @@ def parse_projects(text):
 def calculate_ats_score(resume_skills, job_description):
     job_desc = job_description.lower()
 
-    job_skill_set = set()
-    for category in TECH_SKILLS.values():
-        for skill, aliases in category.items():
-            if re.search(r"\b" + re.escape(skill) + r"\b", job_desc):
-                job_skill_set.add(skill)
-            for a in aliases:
-                if re.search(r"\b" + re.escape(a) + r"\b", job_desc):
-                    job_skill_set.add(skill)
+    matcher = current_taxonomy()["matcher"]
+    category = matcher["category"]
+    job_skill_set = {
+        skill for skill in match_skills(job_desc, matcher)
+        if category[skill] != "soft"
+    }
 
     if not job_skill_set:
         return 0, [], []
 
-    resume_skill_set = set(resume_skills.keys())
+    resume_skill_set = resume_skill_keys(resume_skills)
     matched = resume_skill_set & job_skill_set
     missing = job_skill_set - resume_skill_set
 
     score = int(len(matched) / len(job_skill_set) * 100)
     return score, list(matched), list(missing)
 
+# ---------------------------------------------------
+# FIELD CONFIDENCE (0..1, cheap checks on the rule-based result)
+# ---------------------------------------------------
+# An empty field is only suspicious when its section exists or the text
+# holds something that looks like it; a filled field is suspicious when
+# its value looks wrong (stopwords in the name, 60 years of experience,
+# the whole resume parsed as one project).
+PHONE_LIKE_RE = re.compile(r"\d[\d\s().-]{7,}\d")
+MAX_EXPERIENCE_YEARS = 45
+MAX_PROJECT_DESCRIPTION = 1500
+
+def name_confidence(name):
+    if not name:
+        return 0.0
+    words = name.split()
+    if any(w.lower() in NAME_STOPWORDS for w in words):
+        return 0.2
+    # Initials ("R K Sharma", "Mangesh A Bandre") are normal; a name of
+    # initials only is not
+    if all(len(w.strip(".")) < 2 for w in words):
+        return 0.4
+    return 0.9 if len(words) <= 3 else 0.6
+
+def field_confidence(rule, raw_text, kinds, experience_text=""):
+    # kinds: section kinds found in the text (index_sections)
+    skills = len(rule["skills"])
+    projects = rule["projects"]
+    return {
+        "name": name_confidence(rule["name"]),
+        "email": 1.0 if rule["email"] else (0.0 if "@" in raw_text else 0.9),
+        "phone": (
+            0.9 if rule["phone"] else
+            0.0 if PHONE_LIKE_RE.search(raw_text) else 0.9
+        ),
+        "skills": (
+            0.0 if not skills else
+            min(1.0, 0.6 + 0.08 * skills) if skills >= 3 else
+            0.5 if "skills" in kinds else 0.3
+        ),
+        "experience_years": (
+            (0.9 if rule["experience_years"] <= MAX_EXPERIENCE_YEARS else 0.2)
+            if rule["experience_years"] > 0 else
+            # No years under the heading: a fresher's 0 is the answer
+            0.2 if YEAR_RE.search(experience_text) else 0.7
+        ),
+        "education": (
+            0.9 if rule["education"] else
+            0.2 if "education" in kinds else 0.6
+        ),
+        "projects": (
+            (0.1 if "projects" in kinds else 0.5) if not projects else
+            0.3 if any(len(p.get("description") or "") > MAX_PROJECT_DESCRIPTION
+                       for p in projects) else
+            0.9 if "projects" in kinds else 0.5
+        ),
+    }
+
+# ---------------------------------------------------
+# LLM POLICY (which fields are worth an Ollama call)
+# ---------------------------------------------------
+# LLM_POLICY=confidence     ask for every field below its threshold
+# LLM_POLICY=legacy         only when skills or projects are empty, then
+#                           every empty field (the old rule)
+# LLM_POLICY=never          rules only
+# LLM_THRESHOLDS="name=0.5,projects=0.4"   per-field overrides; 0 = never
+#                                          ask for that field
+LLM_POLICY = os.environ.get("LLM_POLICY", "confidence")
+LLM_THRESHOLDS = {
+    "name": 0.5,
+    "email": 0.5,
+    "phone": 0.5,
+    "skills": 0.5,
+    "experience_years": 0.3,
+    "education": 0.3,
+    "projects": 0.4,
+}
+for _item in filter(None, os.environ.get("LLM_THRESHOLDS", "").split(",")):
+    _field, _, _value = _item.partition("=")
+    try:
+        if _field.strip() in LLM_THRESHOLDS:
+            LLM_THRESHOLDS[_field.strip()] = float(_value)
+    except ValueError:
+        print(f"Ignoring LLM_THRESHOLDS entry {_item!r}: not a number",
+              file=sys.stderr)
+
+def llm_fields(rule, policy=None):
+    policy = policy or LLM_POLICY
+    if policy == "never":
+        return []
+    if policy == "legacy":
+        if rule["skills"] and rule["projects"]:
+            return []
+        return [f for f in LLM_FIELDS if not rule[f]]
+    if policy != "confidence":
+        raise ValueError(f"Unknown LLM policy: {policy}")
+
+    confidence = rule["confidence"]
+    return [f for f in LLM_FIELDS if confidence[f] < LLM_THRESHOLDS[f]]
+
 # ---------------------------------------------------
 # MAIN PARSER
 # ---------------------------------------------------
-def parse_resume(file_path, job_description=""):
-    raw_text = read_pdf(file_path)
-    sections = split_sections(raw_text)
-
-    summary_text = get_section(sections, SECTION_ALIASES["summary"])
-    skill_text = get_section(sections, SECTION_ALIASES["skills"])
-    project_text = get_section(sections, SECTION_ALIASES["projects"])
-    experience_text = get_section(sections, SECTION_ALIASES["experience"])
-    education_text = get_section(sections, SECTION_ALIASES["education"])
-    projects = parse_projects(project_text)
-    if not projects:
-        projects = parse_projects(raw_text)
-
-    # Rule-based extraction
-    rule_result = {
-        "name": extract_name(raw_text),
-        "email": extract_email(raw_text),
-        "phone": extract_phone(raw_text),
-        "skills": extract_skills(skill_text),
-        "experience_years": extract_experience(experience_text),
-        "education": extract_education(education_text),
+# ---------------------------------------------------
+# STAGE TIMINGS (opt-in)
+# ---------------------------------------------------
+# PARSE_TIMINGS=1          attach a "timings" block to every result
+# PARSE_PROFILE_DIR=dir    dump a cProfile .prof file per parse
+PARSE_TIMINGS = os.environ.get("PARSE_TIMINGS") == "1"
+PARSE_PROFILE_DIR = os.environ.get("PARSE_PROFILE_DIR")
+
+@contextmanager
+def _timed(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        timings[name] = timings.get(name, 0.0) + elapsed
+
+def stage(timings, name):
+    # No-op unless timings were requested for this parse
+    return nullcontext() if timings is None else _timed(timings, name)
+
+def extract_rule_based(raw_text, timings=None, spacy_fallback=True):
+    with stage(timings, "index_sections"):
+        sections = index_sections(raw_text)
+
+        summary_text = section_text(sections, "summary")
+        skill_text = section_text(sections, "skills")
+        project_text = section_text(sections, "projects")
+        experience_text = section_text(sections, "experience")
+        education_text = section_text(sections, "education")
+
+    with stage(timings, "parse_projects"):
+        projects = parse_projects(project_text)
+        if not projects:
+            projects = parse_projects(raw_text)
+
+    with stage(timings, "extract_name"):
+        name = extract_name(raw_text, spacy_fallback)
+    with stage(timings, "extract_contact"):
+        email = extract_email(raw_text)
+        phone = extract_phone(raw_text)
+    with stage(timings, "extract_skills"):
+        skills = extract_skills(skill_text)
+    with stage(timings, "extract_experience"):
+        experience_years = extract_experience(experience_text)
+    with stage(timings, "extract_education"):
+        education = extract_education(education_text)
+
+    result = {
+        "name": name,
+        "email": email,
+        "phone": phone,
+        "skills": skills,
+        "experience_years": experience_years,
+        "education": education,
         "projects": projects,
         "summary": summary_text[:500]
     }
+    with stage(timings, "field_confidence"):
+        result["confidence"] = field_confidence(
+            result, raw_text, sections["kinds"], experience_text
+        )
+    return result
 
-    # LLM fallback ONLY if skills missing
-    llm_result = {}
-    if not rule_result["skills"] or not rule_result["projects"]:
-        try:
-            llm_result = llm_extract_resume(raw_text)
-        except Exception:
-            llm_result = {}
+# ---------------------------------------------------
+# RESULT CACHE (file SHA-256 + parser/taxonomy version)
+# ---------------------------------------------------
+# Bump PARSER_VERSION whenever extraction logic changes. The taxonomy
+# version is added per parse, since the taxonomy can be reloaded.
+PARSER_VERSION = "8"
+def _cache_version():
+    return (
+        f"{PARSER_VERSION}-{OLLAMA_MODEL}-{resolve_pdf_backend()}"
+        f"-{PDF_MAX_PAGES}p{PDF_MAX_CHARS}c{'-nospacy' if NO_SPACY else ''}"
+        f"-fuzzy{FUZZY_THRESHOLD if FUZZY_ENABLED else 'off'}"
+        f"-llm{LLM_POLICY}{','.join(f'{t:g}' for t in LLM_THRESHOLDS.values())}"
+    )
+
+CACHE_VERSION = _cache_version()
 
-    final = merge_results(rule_result, llm_result)
+RESULT_CACHE = open_cache()
 
-    ats_score, matched, missing = calculate_ats_score(
-        final["skills"], job_description
+# ---------------------------------------------------
+# NEAR-DUPLICATES (MinHash/LSH over the extracted text)
+# ---------------------------------------------------
+# A resend or light edit of an earlier resume has a new SHA-256, so it
+# misses the result cache. Its text fingerprint still finds the earlier
+# parse: rules rerun (milliseconds, and they pick up the edits), the
+# earlier LLM answer is reused for the missing fields except contact
+# details, and the result names the earlier file and the fields that
+# changed. Similar text alone is not enough: two candidates on one
+# template can pass the threshold, so the earlier parse must also share
+# an email or phone number. Opt-in (RESUME_DEDUP=1, resume_dedup.py).
+DEDUP_INDEX = open_dedup_index()
+CONTACT_FIELDS = ("name", "email", "phone")
+
+def _same_candidate(rule, earlier):
+    email, phone = rule["email"], rule["phone"]
+    return bool(
+        (email and email.lower() == (earlier.get("email") or "").lower())
+        or (phone and re.sub(r"\D", "", phone)
+            == re.sub(r"\D", "", earlier.get("phone") or ""))
     )
 
-    final["file"] = file_path
-    final["ats_score"] = ats_score
-    final["job_match"] = {
-        "matched_skills": matched,
-        "missing_skills": missing
-    }
-    # ---------------------------------------------------
-    # NORMALIZE EDUCATION (LLM + RULE SAFE)
-    # ---------------------------------------------------
-    normalized_education = []
-    
-    for e in final.get("education", []):
+def _changed_fields(rule, earlier):
+    return [f for f in LLM_FIELDS if rule[f] != earlier.get(f)]
+
+# on_event(event, data) receives partial results as soon as they exist:
+#   "contact"   {name, email, phone}
+#   "rules"     {skills, experience_years, education, projects}
+#   "enriching" {fields}   only when the LLM fallback is about to run
+# The complete result (LLM fields merged, ATS score) is the return value.
+# With data (the PDF's bytes), nothing is read from disk and file_path is
+# only the name reported in the result.
+# With defer_ner, a name that needs spaCy is left to the caller: the
+# result carries "ner_pending" for resolve_names() and
+# complete_deferred_names() instead.
+def parse_resume(file_path, job_description="", cache=None,
+                 priority=PRIORITY_INTERACTIVE, timings=None, on_event=None,
+                 data=None, defer_ner=False):
+    timings = PARSE_TIMINGS if timings is None else timings
+    args = (file_path, job_description, cache, priority, timings, on_event, data,
+            defer_ner)
+
+    if not PARSE_PROFILE_DIR:
+        return _parse_resume(*args)
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is active (e.g. a concurrent parse on 3.12+)
+        return _parse_resume(*args)
+    try:
+        return _parse_resume(*args)
+    finally:
+        profiler.disable()
+        os.makedirs(PARSE_PROFILE_DIR, exist_ok=True)
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        profiler.dump_stats(os.path.join(
+            PARSE_PROFILE_DIR, f"{name}-{int(time.time() * 1000)}.prof"
+        ))
+
+def normalize_education(items):
+    # LLM entries are dicts, rule entries are strings
+    normalized = []
+    for e in items:
         if isinstance(e, dict):
             degree = e.get("name") or e.get("degree")
             institution = e.get("institution") or e.get("university")
             start = e.get("start_date")
             end = e.get("end_date")
-    
+
             years = ""
             if start or end:
                 years = f"({start or ''} – {end or ''})".replace("  ", " ").strip(" –()")
-    
+
             parts = [p for p in [degree, institution, years] if p]
-    
+
             if parts:
-                normalized_education.append(" - ".join(parts))
+                normalized.append(" - ".join(parts))
         else:
-            normalized_education.append(str(e))
-    
-    final["education"] = normalized_education
+            normalized.append(str(e))
+    return normalized
+
+def _parse_resume(file_path, job_description, cache, priority, timings, on_event,
+                  data, defer_ner):
+    started = time.perf_counter()
+    stages = {} if timings else None
+    emit = on_event or (lambda event, data: None)
+
+    cache = cache or RESULT_CACHE
+    with stage(stages, "cache_lookup"):
+        version = f"{CACHE_VERSION}-{current_taxonomy()['version']}"
+        digest = file_digest(file_path) if data is None else data_digest(data)
+        key = cache_key(digest, version)
+
+        # Cached entry: {"text": raw_text, "pages": n,
+        #                "rule": rule_result, "llm": llm_result}
+        entry = cache.get(key)
+
+    cache_hit = entry is not None
+    signature = near = None
+    if entry is None:
+        pdf_stats = {}
+        with stage(stages, "read_pdf"):
+            raw_text = read_pdf(file_path if data is None else data, stats=pdf_stats)
+        entry = {
+            "text": raw_text,
+            "pages": pdf_stats.get("pages"),
+            "truncated": pdf_stats.get("truncated", False),
+            "rule": extract_rule_based(raw_text, stages, spacy_fallback=not defer_ner),
+            "llm": None
+        }
+        if entry["rule"]["name"] is None and defer_ner and not NO_SPACY:
+            # Cached as is; whoever reads it next resolves the name
+            entry["ner_snippet"] = name_snippet(raw_text)
+        with stage(stages, "dedup_lookup"):
+            signature = minhash(raw_text)
+            near = signature and DEDUP_INDEX.query(
+                signature, version,
+                accept=lambda e: _same_candidate(entry["rule"], e["rule"]),
+            )
+            # Same bytes again (result cache off or evicted) is not a resend
+            if near and near["digest"] == digest:
+                near = None
+        if near:
+            entry["duplicate_of"] = {
+                "file": near["file"],
+                "similarity": near["similarity"],
+                "changed": _changed_fields(entry["rule"], near["entry"]["rule"]),
+            }
+    elif entry.get("ner_snippet") and not defer_ner:
+        with stage(stages, "extract_name"):
+            name = person_name(get_nlp()(entry["ner_snippet"]))
+            _complete_deferred_name(entry, name, priority)
+        cache.put(key, entry)
+
+    rule_result = entry["rule"]
+    emit("contact", {f: rule_result[f] for f in CONTACT_FIELDS})
+    emit("rules", {
+        "skills": rule_result["skills"],
+        "experience_years": rule_result["experience_years"],
+        "education": normalize_education(rule_result["education"]),
+        "projects": rule_result["projects"],
+    })
+
+    # LLM fallback only for the fields the policy finds doubtful
+    # (llm is None when not tried yet, or when the last call failed)
+    llm_fired = False
+    if entry["llm"] is None:
+        llm_result = {}
+        asked = llm_fields(rule_result)
+        if entry.get("ner_snippet") and "name" in asked:
+            # The batched spaCy pass resolves the name first; the LLM only
+            # gets it if spaCy finds none (_complete_deferred_name)
+            asked.remove("name")
+            entry["ner_llm"] = True
+        if asked:
+            # Contact details are never taken from the earlier resume: a
+            # resend may change them, and a shared template is not the
+            # same candidate
+            earlier = (near and near["entry"]["llm"]) or {}
+            llm_result = {f: earlier[f] for f in asked
+                          if f in earlier and f not in CONTACT_FIELDS}
+            missing = [f for f in asked if f not in llm_result]
+            if missing:
+                llm_fired = True
+                emit("enriching", {"fields": missing})
+                try:
+                    with stage(stages, "llm_fallback"):
+                        llm_result.update(
+                            llm_extract_resume(entry["text"], missing, priority)
+                        )
+                except Exception:
+                    llm_result = None
+        entry["llm"] = llm_result
+        entry["llm_fields"] = asked
+        with stage(stages, "cache_store"):
+            cache.put(key, entry)
+        if signature and llm_result is not None:
+            with stage(stages, "dedup_store"):
+                DEDUP_INDEX.add(digest, version, signature, file_path,
+                                {"rule": rule_result, "llm": llm_result})
+
+    llm_result = entry["llm"] or {}
+
+    final = merge_results(rule_result, llm_result, entry.get("llm_fields", ()))
+
+    # ATS always reruns: it depends on this call's job description
+    with stage(stages, "calculate_ats_score"):
+        ats_score, matched, missing = calculate_ats_score(
+            final["skills"], job_description
+        )
 
+    final["file"] = file_path
+    final["confidence"] = rule_result["confidence"]
+    if entry.get("truncated"):
+        # Later pages were skipped (PDF_MAX_PAGES / PDF_MAX_CHARS)
+        final["truncated"] = True
+    if entry.get("duplicate_of"):
+        final["duplicate_of"] = entry["duplicate_of"]
+    if entry.get("ner_snippet"):
+        final["ner_pending"] = {
+            "key": key,
+            "snippet": entry["ner_snippet"],
+            "llm": entry.get("ner_llm", False),
+        }
+    final["ats_score"] = ats_score
+    final["job_match"] = {
+        "matched_skills": matched,
+        "missing_skills": missing
+    }
+    # ---------------------------------------------------
+    # NORMALIZE EDUCATION (LLM + RULE SAFE)
+    # ---------------------------------------------------
+    final["education"] = normalize_education(final.get("education", []))
+
+    if timings:
+        final["timings"] = {
+            "total_ms": round((time.perf_counter() - started) * 1000, 2),
+            "stages_ms": {k: round(v, 2) for k, v in stages.items()},
+            "pages": entry.get("pages"),
+            "text_chars": len(entry["text"]),
+            "cache_hit": cache_hit,
+            "llm_fallback": llm_fired,
+            "llm_fields": entry.get("llm_fields"),
+        }
 
     return final
 
+# ---------------------------------------------------
+# DEFERRED NAMES (defer_ner)
+# ---------------------------------------------------
+# Returns the final name. One spaCy cannot find either goes to the LLM,
+# as an undeferred parse would have asked it (ner_llm).
+def _complete_deferred_name(entry, name, priority):
+    entry.pop("ner_snippet", None)
+    wanted = entry.pop("ner_llm", False)
+    entry["rule"]["name"] = name
+    entry["rule"]["confidence"]["name"] = name_confidence(name)
+    # llm None: the LLM step has not run (or failed) and asks for it anyway
+    if name or not wanted or entry["llm"] is None:
+        return name
+
+    try:
+        llm_name = llm_extract_resume(entry["text"], ["name"], priority).get("name")
+    except Exception:
+        return None
+    if llm_name:
+        entry["llm"] = {**entry["llm"], "name": llm_name}
+    entry["llm_fields"] = [*entry.get("llm_fields", ()), "name"]
+    return llm_name or None
+
+# names: resolve_names() over the results' ner_pending snippets, in order.
+# Each name is written back to the cached entry, so later runs skip NER.
+def complete_deferred_names(results, names, cache=None, priority=PRIORITY_BULK):
+    cache = cache or RESULT_CACHE
+    for result, name in zip(results, names):
+        pending = result.pop("ner_pending")
+        entry = cache.get(pending["key"])
+        stored = entry is not None and entry.get("ner_snippet") is not None
+        if not stored:
+            # Result cache off or entry evicted: just enough of one
+            entry = {
+                "text": pending["snippet"], "llm": {}, "ner_llm": pending["llm"],
+                "rule": {"name": None, "confidence": {}},
+            }
+
+        result["name"] = _complete_deferred_name(entry, name, priority)
+        result["confidence"]["name"] = entry["rule"]["confidence"]["name"]
+        if stored:
+            cache.put(pending["key"], entry)
+
+# ---------------------------------------------------
+# WORKER MODE (long-lived, JSON lines over stdin/stdout)
+# ---------------------------------------------------
+# Request:  {"id": 1, "file": "...", "job_description": "...",
+#            "priority": "interactive" | "bulk", "timings": true,
+#            "stream": true}
+#           {"id": 1, "name": "cv.pdf", "data": "<base64 PDF>", ...}
+#           {"id": 2, "op": "metrics"}
+#           {"id": 3, "op": "match_jobs", "skills": [...], "top": 10}
+# Response: {"id": 1, "event": "contact", "data": {...}}   (stream only)
+#           {"id": 1, "ok": true, "result": {...}}
+#           {"id": 1, "ok": false, "error": "..."}
+# A {"ready": true} line is written once the model is loaded. With
+# threads > 1, jobs run concurrently (replies may come out of order) and
+# their LLM fallbacks share one micro-batching scheduler.
+def serve(stdin=None, stdout=None, threads=1):
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    send_lock = threading.Lock()
+
+    # Keep the protocol channel clean: stray prints go to stderr
+    sys.stdout = sys.stderr
+
+    def send(msg):
+        with send_lock:
+            stdout.write(json.dumps(msg) + "\n")
+            stdout.flush()
+
+    def handle(job):
+        try:
+            if job.get("op") == "metrics":
+                result = {"llm": scheduler_metrics(), "pdf": PDF_TIMINGS}
+            elif job.get("op") == "match_jobs":
+                result = match_jobs(job.get("skills") or [], get_job_index(),
+                                    job.get("top"))
+            else:
+                priority = PRIORITIES.get(job.get("priority"), PRIORITY_INTERACTIVE)
+                on_event = None
+                if job.get("stream"):
+                    # Partial results go out as they appear, before the final reply
+                    on_event = lambda event, data: send(
+                        {"id": job.get("id"), "event": event, "data": data}
+                    )
+                data = None
+                if job.get("data") is not None:
+                    # Upload bytes sent inline: no temp file round-trip
+                    data = base64.b64decode(job["data"])
+                result = parse_resume(
+                    job["file"] if data is None else job.get("name") or "upload.pdf",
+                    job.get("job_description") or "",
+                    priority=priority, timings=job.get("timings"),
+                    on_event=on_event, data=data
+                )
+            send({"id": job.get("id"), "ok": True, "result": result})
+        except Exception as e:
+            send({"id": job.get("id"), "ok": False, "error": str(e)})
+
+    executor = ThreadPoolExecutor(threads) if threads > 1 else None
+    # Load the skill matcher before reporting ready
+    current_taxonomy()
+    send({"ready": True})
+
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            job = json.loads(line)
+        except ValueError as e:
+            send({"id": None, "ok": False, "error": str(e)})
+            continue
+
+        if executor:
+            executor.submit(handle, job)
+        else:
+            handle(job)
+
+    if executor:
+        executor.shutdown(wait=True)
+
+# ---------------------------------------------------
+# BATCH MODE (directory / glob / manifest -> NDJSON)
+# ---------------------------------------------------
+def collect_batch_files(source):
+    # Directory: every PDF below it
+    if os.path.isdir(source):
+        files = glob.glob(os.path.join(source, "**", "*"), recursive=True)
+        return sorted(f for f in files if f.lower().endswith(".pdf"))
+
+    # Manifest: one path per line, relative to the manifest's folder
+    if os.path.isfile(source) and not source.lower().endswith(".pdf"):
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, encoding="utf-8") as f:
+            lines = [l.strip() for l in f]
+        return [
+            os.path.join(base, l)
+            for l in lines
+            if l and not l.startswith("#")
+        ]
+
+    # Glob pattern (or a single PDF)
+    return sorted(glob.glob(source, recursive=True))
+
+def _batch_job(job):
+    file_path, job_description = job
+    start = time.perf_counter()
+    try:
+        result = parse_resume(
+            file_path, job_description, priority=PRIORITY_BULK, defer_ner=True
+        )
+        out = {"file": file_path, "ok": True, "result": result}
+    except Exception as e:
+        out = {"file": file_path, "ok": False, "error": f"{type(e).__name__}: {e}"}
+    out["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return out
+
+def run_batch(source, job_description="", workers=None, out=None):
+    out = out or sys.stdout
+    files = collect_batch_files(source)
+    jobs = [(f, job_description) for f in files]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+
+    counts = Counter()
+    ner = {"docs": 0, "ms": 0.0}
+    pending = []  # (result, arrival time) waiting for a spaCy name
+    start = time.perf_counter()
+
+    def write(item):
+        counts["ok" if item["ok"] else "failed"] += 1
+        out.write(json.dumps(item) + "\n")
+        out.flush()
+
+    def flush_names():
+        # One nlp.pipe pass over every deferred name, mapped back in order
+        t0 = time.perf_counter()
+        results = [item["result"] for item, _ in pending]
+        names = resolve_names([r["ner_pending"]["snippet"] for r in results])
+        ner["docs"] += len(pending)
+        ner["ms"] += (time.perf_counter() - t0) * 1000
+        complete_deferred_names(results, names)
+        for item, _ in pending:
+            write(item)
+        pending.clear()
+
+    def flush_due():
+        # Seconds until the oldest pending result must be written (None:
+        # nothing pending); a full or overdue batch is flushed now
+        if not pending:
+            return None
+        wait = pending[0][1] + NER_FLUSH_S - time.monotonic()
+        if len(pending) >= NER_BATCH_SIZE or wait <= 0:
+            flush_names()
+            return None
+        return wait
+
+    def emit(item):
+        if item["ok"] and item["result"].get("ner_pending"):
+            pending.append((item, time.monotonic()))
+        else:
+            write(item)
+        flush_due()
+
+    if workers == 1:
+        for job in jobs:
+            emit(_batch_job(job))
+    else:
+        # spaCy only loads in this process, for the batched name pass; the
+        # pool processes split this process's Ollama slots between them
+        with multiprocessing.Pool(
+            workers, initializer=set_slots, initargs=(share_slots(workers),)
+        ) as pool:
+            results = pool.imap_unordered(_batch_job, jobs, chunksize=1)
+            while True:
+                # Wake up when the oldest pending result is due, so slow
+                # parses elsewhere in the pool do not hold it back
+                try:
+                    emit(results.next(timeout=flush_due()))
+                except multiprocessing.TimeoutError:
+                    continue
+                except StopIteration:
+                    break
+    if pending:
+        flush_names()
+
+    ok, failed = counts["ok"], counts["failed"]
+    elapsed = time.perf_counter() - start
+    summary = {
+        "files": len(jobs),
+        "ok": ok,
+        "failed": failed,
+        "workers": workers,
+        "elapsed_s": round(elapsed, 2),
+        "resumes_per_s": round(len(jobs) / elapsed, 2) if elapsed else 0.0,
+        "ner_docs": ner["docs"],
+        "ner_ms": round(ner["ms"], 1),
+    }
+    print(
+        f"Parsed {ok}/{len(jobs)} resumes ({failed} failed) in "
+        f"{summary['elapsed_s']}s with {workers} workers "
+        f"- {summary['resumes_per_s']} resumes/s"
+        + (f", {ner['docs']} names via nlp.pipe in {summary['ner_ms']} ms"
+           if ner["docs"] else ""),
+        file=sys.stderr,
+    )
+    return summary
+
 # ---------------------------------------------------
 # CLI
 # ---------------------------------------------------
 if __name__ == "__main__":
-    file_path = sys.argv[1]
-    job_desc = sys.argv[2] if len(sys.argv) > 2 else ""
-    result = parse_resume(file_path, job_desc)
-    print(json.dumps(result, indent=2))
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Parse resumes into JSON")
+    parser.add_argument("file", nargs="?",
+                        help="resume PDF to parse ('-' reads the PDF from stdin)")
+    parser.add_argument("job_description", nargs="?", default="")
+    parser.add_argument("--serve", action="store_true",
+                        help="run as a long-lived JSON-lines worker")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="concurrent jobs per --serve worker")
+    parser.add_argument("--batch", metavar="SOURCE",
+                        help="directory, glob or manifest of PDFs (NDJSON output)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="batch process pool size (default: CPU count)")
+    parser.add_argument("--job-description", dest="batch_job_description",
+                        default="", help="job description for batch ATS scoring")
+    parser.add_argument("--compare-pdf-backends", action="store_true",
+                        help="time every available PDF backend on the file")
+    parser.add_argument("--no-spacy", action="store_true",
+                        help="never load spaCy; use the heuristic name fallback")
+    parser.add_argument("--timings", action="store_true",
+                        help="attach per-stage timings to every result")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="write a cProfile .prof file per parse into DIR")
+    parser.add_argument("--stream", action="store_true",
+                        help="print partial results as NDJSON events")
+    args = parser.parse_args()
+
+    # Also exported so spawned batch workers pick the settings up
+    if args.no_spacy:
+        NO_SPACY = True
+        os.environ["PARSER_NO_SPACY"] = "1"
+        CACHE_VERSION = _cache_version()
+    if args.timings:
+        PARSE_TIMINGS = True
+        os.environ["PARSE_TIMINGS"] = "1"
+    if args.profile:
+        PARSE_PROFILE_DIR = os.environ["PARSE_PROFILE_DIR"] = args.profile
+
+    if args.serve:
+        serve(threads=args.threads)
+    elif args.compare_pdf_backends and args.file:
+        report = {}
+        for name, (available, extract, _) in PDF_BACKENDS.items():
+            if not available:
+                continue
+            start = time.perf_counter()
+            pages = list(extract(args.file))
+            report[name] = {
+                "ms": round((time.perf_counter() - start) * 1000, 1),
+                "pages": len(pages),
+                "chars": sum(len(t or "") for t in pages),
+            }
+        print(json.dumps(report, indent=2))
+    elif args.batch:
+        run_batch(args.batch, args.batch_job_description, args.workers)
+    elif args.file:
+        file_path, data = args.file, None
+        if args.file == "-":
+            file_path, data = "stdin", sys.stdin.buffer.read()
+
+        if args.stream:
+            def print_event(event, data):
+                print(json.dumps({"event": event, "data": data}), flush=True)
+
+            result = parse_resume(
+                file_path, args.job_description, on_event=print_event, data=data
+            )
+            print_event("result", result)
+        else:
+            result = parse_resume(file_path, args.job_description, data=data)
+            print(json.dumps(result, indent=2))
+    else:
+        parser.error("a resume file, --serve or --batch is required")
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+# ---------------------------------------------------
+# CONFIG
+# ---------------------------------------------------
+# RESUME_CACHE=0          disable caching
+# RESUME_CACHE_PATH=...   SQLite file (default: python/.cache/parse_cache.sqlite3)
+# RESUME_CACHE_MAX_MB=256 size bound before LRU eviction
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "parse_cache.sqlite3"
+)
+DEFAULT_MAX_MB = 256
+
+# ---------------------------------------------------
+# KEYS
+# ---------------------------------------------------
+def file_digest(file_path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def data_digest(data):
+    # Same digest as file_digest for a PDF held in memory
+    return hashlib.sha256(data).hexdigest()
+
+def cache_key(digest, version):
+    return f"{digest}:{version}"
+
+# ---------------------------------------------------
+# BACKENDS
+# ---------------------------------------------------
+# Any object with get(key) -> dict | None and put(key, value) can be
+# passed to parse_resume as a cache backend.
+class NullCache:
+    def get(self, key):
+        return None
+
+    def put(self, key, value):
+        pass
+
+
+class SQLiteCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_MB << 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _connect(self):
+        # One connection per process and thread (workers are forked, and a
+        # --serve worker may run several jobs on threads)
+        local = self._local
+        if getattr(local, "conn", None) is not None and local.pid == os.getpid():
+            return local.conn
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)"
+        )
+        local.conn, local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None
+
+        conn.execute(
+            "UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key)
+        )
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key, value):
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, accessed)"
+            " VALUES (?, ?, ?, ?)",
+            (key, blob, len(blob), time.time()),
+        )
+        self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop least recently used entries until we are back under the bound
+        stale = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed"
+        ):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+
+def open_cache():
+    if os.environ.get("RESUME_CACHE", "1") == "0":
+        return NullCache()
+
+    path = os.environ.get("RESUME_CACHE_PATH", DEFAULT_CACHE_PATH)
+    max_mb = float(os.environ.get("RESUME_CACHE_MAX_MB", DEFAULT_MAX_MB))
+    return SQLiteCache(path, int(max_mb * (1 << 20)))
@@ -0,0 +1,297 @@
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import random
+import sqlite3
+import hashlib
+import argparse
+import threading
+from array import array
+
+# NumPy is optional: with it a signature is one vectorised min over all
+# shingles, without it the same values come from a Python loop.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ---------------------------------------------------
+# CONFIG
+# ---------------------------------------------------
+# RESUME_DEDUP=1                  enable near-duplicate detection (off by
+#                                 default: it reuses another upload's answers)
+# RESUME_DEDUP_PATH=...           SQLite file (default: python/.cache/dedup.sqlite3)
+# RESUME_DEDUP_THRESHOLD=0.9      minimum estimated Jaccard similarity
+# RESUME_DEDUP_MAX_DOCS=100000    oldest fingerprints are dropped past this
+DEFAULT_DEDUP_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "dedup.sqlite3"
+)
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_MAX_DOCS = 100000
+
+SHINGLE_WORDS = 3
+# 16 bands of 4 rows: pairs at Jaccard 0.9 share a band with probability
+# > 0.999, pairs at 0.5 about 0.64 of the time (then rejected on the full
+# signature)
+BANDS = 16
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+
+# Universal hashing h(x) = (a * x + b) mod P over 32-bit shingle hashes,
+# fixed seed so signatures stay comparable across processes and restarts.
+# a < 2**31 keeps a * x inside 64 bits for the NumPy path.
+PRIME = (1 << 31) - 1
+_rng = random.Random(20240601)
+PERM_A = [_rng.randrange(1, PRIME) for _ in range(NUM_PERM)]
+PERM_B = [_rng.randrange(0, PRIME) for _ in range(NUM_PERM)]
+
+# ---------------------------------------------------
+# MINHASH SIGNATURE
+# ---------------------------------------------------
+WORD_RE = re.compile(r"[a-z0-9+#@.]+")
+
+def shingles(text):
+    # Word 3-grams of the lowercased text; layout and punctuation changes
+    # between two exports of the same CV do not move them
+    words = WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {
+        " ".join(words[i:i + SHINGLE_WORDS])
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    }
+
+def _shingle_hash(shingle):
+    return zlib.crc32(shingle.encode("utf-8"))
+
+def minhash(text):
+    hashes = [_shingle_hash(s) for s in shingles(text)]
+    if not hashes:
+        return None
+
+    if np is not None:
+        x = np.array(hashes, dtype=np.uint64)
+        return array("Q", (
+            int(((np.uint64(a) * x + np.uint64(b)) % np.uint64(PRIME)).min())
+            for a, b in zip(PERM_A, PERM_B)
+        ))
+
+    return array("Q", (
+        min((a * x + b) % PRIME for x in hashes)
+        for a, b in zip(PERM_A, PERM_B)
+    ))
+
+def similarity(sig_a, sig_b):
+    # Estimated Jaccard similarity of the two shingle sets
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+def band_keys(sig):
+    # One bucket per band; the band number is part of the key
+    keys = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(
+            bytes([band]) + rows.tobytes(), digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+# ---------------------------------------------------
+# LSH INDEX (persistent)
+# ---------------------------------------------------
+# docs:  digest, parser version, signature and the parse entry to reuse
+# bands: (bucket, doc) pairs, the primary key makes a lookup one B-tree
+#        probe per band
+class NullIndex:
+    def query(self, sig, version, accept=None):
+        return None
+
+    def add(self, digest, version, sig, file, entry):
+        pass
+
+
+class DedupIndex:
+    def __init__(self, path=DEFAULT_DEDUP_PATH, threshold=DEFAULT_THRESHOLD,
+                 max_docs=DEFAULT_MAX_DOCS):
+        self.path = path
+        self.threshold = threshold
+        self.max_docs = max_docs
+        self._local = threading.local()
+
+    def _connect(self):
+        # One connection per process and thread, as in resume_cache
+        local = self._local
+        if getattr(local, "conn", None) is not None and local.pid == os.getpid():
+            return local.conn
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " id INTEGER PRIMARY KEY,"
+            " digest TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " sig BLOB NOT NULL,"
+            " file TEXT,"
+            " entry BLOB NOT NULL,"
+            " added REAL NOT NULL,"
+            " UNIQUE (digest, version))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bands ("
+            " bucket INTEGER NOT NULL,"
+            " doc INTEGER NOT NULL,"
+            " PRIMARY KEY (bucket, doc)) WITHOUT ROWID"
+        )
+        local.conn, local.pid = conn, os.getpid()
+        return conn
+
+    def query(self, sig, version, accept=None):
+        # Closest earlier document of the same parser version at or above
+        # the threshold: {"digest", "file", "similarity", "entry"} or None.
+        # accept(entry) can turn down a match; the next closest is tried.
+        conn = self._connect()
+        keys = band_keys(sig)
+        rows = conn.execute(
+            "SELECT DISTINCT d.id, d.sig FROM bands b JOIN docs d ON d.id = b.doc"
+            f" WHERE b.bucket IN ({','.join('?' * len(keys))}) AND d.version = ?",
+            (*keys, version),
+        ).fetchall()
+
+        scored = [(similarity(sig, array("Q", blob)), doc_id) for doc_id, blob in rows]
+        for score, doc_id in sorted(scored, reverse=True):
+            if score < self.threshold:
+                break
+            digest, file, entry = conn.execute(
+                "SELECT digest, file, entry FROM docs WHERE id = ?", (doc_id,)
+            ).fetchone()
+            entry = json.loads(zlib.decompress(entry))
+            if accept is None or accept(entry):
+                return {
+                    "digest": digest,
+                    "file": file,
+                    "similarity": round(score, 3),
+                    "entry": entry,
+                }
+        return None
+
+    def add(self, digest, version, sig, file, entry):
+        blob = zlib.compress(json.dumps(entry).encode("utf-8"))
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            old = conn.execute(
+                "SELECT id FROM docs WHERE digest = ? AND version = ?",
+                (digest, version),
+            ).fetchone()
+            if old:
+                self._delete(conn, [old[0]])
+            doc_id = conn.execute(
+                "INSERT INTO docs (digest, version, sig, file, entry, added)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, version, sig.tobytes(), file, blob, time.time()),
+            ).lastrowid
+            conn.executemany(
+                "INSERT OR IGNORE INTO bands (bucket, doc) VALUES (?, ?)",
+                [(key, doc_id) for key in band_keys(sig)],
+            )
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _delete(self, conn, ids):
+        for doc_id in ids:
+            sig = conn.execute(
+                "SELECT sig FROM docs WHERE id = ?", (doc_id,)
+            ).fetchone()[0]
+            conn.executemany(
+                "DELETE FROM bands WHERE bucket = ? AND doc = ?",
+                [(key, doc_id) for key in band_keys(array("Q", sig))],
+            )
+            conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+    def _evict(self, conn):
+        count = conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        if count <= self.max_docs:
+            return
+        stale = [r[0] for r in conn.execute(
+            "SELECT id FROM docs ORDER BY added LIMIT ?", (count - self.max_docs,)
+        )]
+        self._delete(conn, stale)
+
+
+def open_dedup_index():
+    if os.environ.get("RESUME_DEDUP", "0") != "1":
+        return NullIndex()
+
+    return DedupIndex(
+        os.environ.get("RESUME_DEDUP_PATH", DEFAULT_DEDUP_PATH),
+        float(os.environ.get("RESUME_DEDUP_THRESHOLD", DEFAULT_THRESHOLD)),
+        int(os.environ.get("RESUME_DEDUP_MAX_DOCS", DEFAULT_MAX_DOCS)),
+    )
+
+# ---------------------------------------------------
+# CLI (query latency over a synthetic index)
+# ---------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the dedup LSH index")
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--path", default=os.path.join(
+        os.path.dirname(DEFAULT_DEDUP_PATH), "dedup-bench.sqlite3"))
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    vocab = [f"w{i}" for i in range(5000)]
+    texts = [" ".join(rng.choices(vocab, k=400)) for _ in range(args.docs)]
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.path + suffix):
+            os.remove(args.path + suffix)
+    index = DedupIndex(args.path, max_docs=args.docs)
+
+    start = time.perf_counter()
+    sigs = [minhash(t) for t in texts]
+    sig_ms = (time.perf_counter() - start) * 1000 / args.docs
+
+    start = time.perf_counter()
+    for i, sig in enumerate(sigs):
+        index.add(f"doc{i}", "bench", sig, f"doc{i}.pdf", {})
+    add_ms = (time.perf_counter() - start) * 1000 / args.docs
+
+    # Queries: lightly edited copies (one word in 100 replaced, Jaccard
+    # around 0.94), plus unrelated texts that must not match
+    picks = [rng.randrange(args.docs) for _ in range(args.queries)]
+    edited = []
+    for i in picks:
+        words = texts[i].split()
+        for j in range(0, len(words), 100):
+            words[j] = rng.choice(vocab)
+        edited.append(minhash(" ".join(words)))
+
+    unrelated = [
+        minhash(" ".join(rng.choices(vocab, k=400))) for _ in range(args.queries)
+    ]
+
+    hits = false_hits = 0
+    start = time.perf_counter()
+    for i, sig in zip(picks, edited):
+        found = index.query(sig, "bench")
+        hits += bool(found and found["digest"] == f"doc{i}")
+    for sig in unrelated:
+        false_hits += index.query(sig, "bench") is not None
+    query_ms = (time.perf_counter() - start) * 1000 / (2 * args.queries)
+
+    print(
+        f"{args.docs} docs: signature {sig_ms:.2f} ms, add {add_ms:.2f} ms, "
+        f"query {query_ms:.3f} ms, recall {hits}/{args.queries}, "
+        f"false matches {false_hits}/{args.queries}",
+        file=sys.stderr,
+    )
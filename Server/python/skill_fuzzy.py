@@ -0,0 +1,176 @@
+import os
+import re
+import math
+import threading
+from array import array
+from collections import Counter
+
+# NumPy/SciPy are optional: with them a whole batch of phrases is scored
+# against the taxonomy in one sparse matrix product, without them the same
+# scores come from an inverted n-gram index.
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+# ---------------------------------------------------
+# CONFIG
+# ---------------------------------------------------
+# SKILL_FUZZY=0                 exact aliases only
+# SKILL_FUZZY_THRESHOLD=0.8     minimum cosine similarity to accept a match
+FUZZY_ENABLED = os.environ.get("SKILL_FUZZY", "1") != "0"
+FUZZY_THRESHOLD = float(os.environ.get("SKILL_FUZZY_THRESHOLD", "0.8"))
+
+NGRAM = 3
+# Shorter names ("c", "go", "aws") are left to the exact matcher
+MIN_CHARS = 4
+MAX_WORDS = 4
+PHRASE_CACHE_SIZE = 20000
+
+# ---------------------------------------------------
+# PHRASES
+# ---------------------------------------------------
+PHRASE_SPLIT_RE = re.compile(r"[,;|•·\n/()\[\]&]|\band\b", re.I)
+VERSION_RE = re.compile(r"\bv?\d+(?:\.\d+)*\+?(?!\w)", re.I)
+SQUASH_RE = re.compile(r"[^a-z0-9+#]")
+
+def squash(text):
+    # "Node JS" / "node.js" / "Node-JS" -> "nodejs"
+    return SQUASH_RE.sub("", text.lower())
+
+def candidate_phrases(text):
+    # Skill-list items: "Languages: Python 3, Postgre SQL" -> ["python",
+    # "postgre sql"]. Sentences (more than MAX_WORDS words) are skipped.
+    phrases = []
+    for piece in PHRASE_SPLIT_RE.split(text or ""):
+        piece = piece.rsplit(":", 1)[-1]
+        piece = VERSION_RE.sub(" ", piece).strip(" \t-*–•.").lower()
+        words = piece.split()
+        if not words or len(words) > MAX_WORDS or len(squash(piece)) < MIN_CHARS:
+            continue
+        phrases.append(" ".join(words))
+    return list(dict.fromkeys(phrases))
+
+def _grams(name):
+    padded = f"^{name}$"
+    return Counter(padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1))
+
+# ---------------------------------------------------
+# INDEX (char n-gram TF-IDF over every skill name and alias)
+# ---------------------------------------------------
+def fuzzy_index_data(taxonomy):
+    # Serializable part of the index (stored in the compiled taxonomy
+    # artifact). The transposed, L2-normalised TF-IDF matrix is kept in CSR
+    # form as flat arrays: n-gram col's entries are ptr[col]:ptr[col + 1].
+    names, owners = [], []
+    for skills in taxonomy.values():
+        for skill, aliases in skills.items():
+            for name in dict.fromkeys(squash(n) for n in [skill] + list(aliases)):
+                if len(name) >= MIN_CHARS:
+                    names.append(name)
+                    owners.append(skill)
+
+    grams = [_grams(n) for n in names]
+    df = Counter(g for counts in grams for g in counts)
+    vocab = {g: i for i, g in enumerate(sorted(df))}
+    # Smoothed idf; unseen n-grams get the largest weight
+    idf = array("d", (math.log((1 + len(names)) / (1 + df[g])) + 1 for g in vocab))
+
+    postings = [[] for _ in vocab]
+    for entry, counts in enumerate(grams):
+        weights = {vocab[g]: tf * idf[vocab[g]] for g, tf in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        for col, w in weights.items():
+            postings[col].append((entry, w / norm))
+
+    ptr = array("q", [0])
+    for column in postings:
+        ptr.append(ptr[-1] + len(column))
+
+    return {
+        "vocab": vocab,
+        "idf": idf,
+        "unseen_idf": math.log(1 + len(names)) + 1,
+        "owners": owners,
+        "ptr": ptr,
+        "entries": array("q", (e for column in postings for e, _ in column)),
+        "weights": array("d", (w for column in postings for _, w in column)),
+    }
+
+def load_fuzzy_index(data):
+    index = {**data, "cache": {}, "lock": threading.Lock()}
+
+    if sparse is not None:
+        index["matrix"] = sparse.csr_matrix(
+            (np.frombuffer(data["weights"], np.float64),
+             np.frombuffer(data["entries"], np.int64),
+             np.frombuffer(data["ptr"], np.int64)),
+            shape=(len(data["vocab"]), len(data["owners"])),
+        )
+    return index
+
+def _phrase_vector(index, phrase):
+    # Unknown n-grams only count towards the norm, so a phrase made mostly
+    # of text the taxonomy never uses cannot score high
+    vocab, idf = index["vocab"], index["idf"]
+    weights, norm = {}, 0.0
+    for g, tf in _grams(squash(phrase)).items():
+        col = vocab.get(g)
+        w = tf * (index["unseen_idf"] if col is None else idf[col])
+        norm += w * w
+        if col is not None:
+            weights[col] = w
+    norm = math.sqrt(norm) or 1.0
+    return {col: w / norm for col, w in weights.items()}
+
+def _best_matches(index, phrases):
+    # (owner index, cosine) of the closest taxonomy name for each phrase
+    vectors = [_phrase_vector(index, p) for p in phrases]
+
+    if "matrix" in index:
+        data, indices, indptr = [], [], [0]
+        for vector in vectors:
+            indices.extend(vector)
+            data.extend(vector.values())
+            indptr.append(len(indices))
+        queries = sparse.csr_matrix(
+            (data, indices, indptr), shape=(len(vectors), len(index["vocab"]))
+        )
+        scores = (queries @ index["matrix"]).toarray()
+        best = scores.argmax(axis=1)
+        return [(int(b), float(scores[i, b])) for i, b in enumerate(best)]
+
+    ptr, entries, weights = index["ptr"], index["entries"], index["weights"]
+    results = []
+    for vector in vectors:
+        scores = Counter()
+        for col, w in vector.items():
+            lo, hi = ptr[col], ptr[col + 1]
+            for entry, ew in zip(entries[lo:hi], weights[lo:hi]):
+                scores[entry] += w * ew
+        results.append(scores.most_common(1)[0] if scores else (0, 0.0))
+    return results
+
+# ---------------------------------------------------
+# MATCH
+# ---------------------------------------------------
+def fuzzy_skills(phrases, index, threshold=None):
+    # phrase -> canonical skill (or None); decisions are cached per phrase
+    threshold = FUZZY_THRESHOLD if threshold is None else threshold
+    cache = index["cache"]
+
+    todo = [p for p in dict.fromkeys(phrases) if p not in cache]
+    if todo:
+        matches = _best_matches(index, todo)
+        with index["lock"]:
+            if len(cache) + len(todo) > PHRASE_CACHE_SIZE:
+                cache.clear()
+            for phrase, (entry, score) in zip(todo, matches):
+                cache[phrase] = (index["owners"][entry], round(score, 3))
+
+    results = {}
+    for phrase in phrases:
+        skill, score = cache.get(phrase, (None, 0.0))
+        results[phrase] = skill if score >= threshold else None
+    return results
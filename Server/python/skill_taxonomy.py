@@ -0,0 +1,250 @@
+import os
+import re
+import sys
+import json
+import time
+import pickle
+import hashlib
+import argparse
+import threading
+from collections import Counter
+
+from skill_fuzzy import fuzzy_index_data, load_fuzzy_index, FUZZY_ENABLED
+
+# ---------------------------------------------------
+# CONFIG
+# ---------------------------------------------------
+# SKILL_TAXONOMY_PATH=...       taxonomy JSON shared by every parser
+# SKILL_MATCHER_PATH=...        compiled matcher artifact
+# SKILL_TAXONOMY_RELOAD_S=5     how often a running worker checks the
+#                               taxonomy file for changes (0 = never)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TAXONOMY_PATH = os.path.join(BASE_DIR, "skills_taxonomy.json")
+DEFAULT_ARTIFACT_PATH = os.path.join(BASE_DIR, ".cache", "skill_matcher.pkl")
+
+TAXONOMY_PATH = os.environ.get("SKILL_TAXONOMY_PATH", DEFAULT_TAXONOMY_PATH)
+ARTIFACT_PATH = os.environ.get("SKILL_MATCHER_PATH", DEFAULT_ARTIFACT_PATH)
+RELOAD_S = float(os.environ.get("SKILL_TAXONOMY_RELOAD_S", "5"))
+
+# Bump when the artifact layout changes
+ARTIFACT_FORMAT = 1
+
+# ---------------------------------------------------
+# COMPILED SKILL MATCHER
+# ---------------------------------------------------
+# Skills and aliases are grouped by their leading one or two characters.
+# A small regex finds every position where a pattern may start (\b before
+# it); only the patterns of that position's group are then tried, so the
+# cost does not grow with the size of the taxonomy. Counts match one
+# \b...\b findall per pattern.
+def _is_word(ch):
+    return ch.isalnum() or ch == "_"
+
+def _leads(patterns):
+    # Two-character leads, or one character where a pattern is that short
+    short = {p for p in patterns if len(p) == 1}
+    return {p: p[:1] if p[:1] in short else p[:2] for p in patterns}
+
+def _lead_regex(leads):
+    return "(?:" + "|".join(re.escape(l) for l in sorted(set(leads))) + ")"
+
+def build_skill_matcher(taxonomy):
+    owners = {}  # pattern -> skills it counts towards
+    category_of = {}
+    for category, skills in taxonomy.items():
+        for skill, aliases in skills.items():
+            category_of.setdefault(skill, category)
+            for p in [skill] + list(aliases):
+                if p:
+                    owners.setdefault(p, []).append(skill)
+
+    lead_of = _leads(owners)
+    groups = {}
+    for p in sorted(owners, key=len):
+        groups.setdefault(lead_of[p], []).append(p)
+
+    # \b before a word char needs a non-word char behind it, and vice versa
+    word_start = [lead_of[p] for p in owners if _is_word(p[0])]
+    other_start = [lead_of[p] for p in owners if not _is_word(p[0])]
+    alternatives = []
+    if word_start:
+        alternatives.append(rf"\b(?={_lead_regex(word_start)})")
+    if other_start:
+        alternatives.append(rf"(?<=\w)(?={_lead_regex(other_start)})")
+
+    return {
+        "starts": "|".join(alternatives) or r"(?!)",
+        "groups": groups,
+        "owners": owners,
+        "category": category_of,
+    }
+
+def compile_matcher(parts):
+    return {**parts, "starts": re.compile(parts["starts"])}
+
+def match_skills(text, matcher=None):
+    matcher = matcher or current_taxonomy()["matcher"]
+    groups, owners = matcher["groups"], matcher["owners"]
+    counts = Counter()
+    last_end = {}
+    n = len(text)
+
+    for m in matcher["starts"].finditer(text):
+        start = m.start()
+        group = groups.get(text[start]) or groups.get(text[start:start + 2], ())
+        for p in group:
+            if not text.startswith(p, start):
+                continue
+            end = start + len(p)
+            # \b after the pattern
+            if _is_word(p[-1]) == (end < n and _is_word(text[end])):
+                continue
+            # findall never overlaps matches of the same pattern
+            if start < last_end.get(p, 0):
+                continue
+            last_end[p] = end
+            for skill in owners[p]:
+                counts[skill] += 1
+
+    return counts
+
+def resume_skill_keys(skills):
+    # Resume skills as taxonomy keys. Rule-based keys are already
+    # lowercase; LLM-added and UI-edited skills may not be. Shared by
+    # calculate_ats_score and job_index so both score a resume alike.
+    return {s.strip().lower() for s in skills}
+
+# ---------------------------------------------------
+# TAXONOMY FILE -> ARTIFACT
+# ---------------------------------------------------
+# Taxonomy: {"tech": {category: {skill: [aliases]}}, "soft": [skills]}
+# Artifact: the same skills plus the matcher's pattern groups and
+# start-position regex, the fuzzy n-gram index and the skill-ID order,
+# keyed by a hash of the taxonomy file. It is a pickle (flat arrays load
+# far faster than JSON) that this module writes itself under .cache/;
+# loading it only compiles one small regex.
+def taxonomy_version(raw):
+    return hashlib.sha256(raw).hexdigest()[:12]
+
+def compile_taxonomy(data, version):
+    tech, soft = data["tech"], data.get("soft", [])
+    parts = build_skill_matcher({**tech, "soft": {s: [] for s in soft}})
+    return {
+        "format": ARTIFACT_FORMAT,
+        "version": version,
+        "tech": tech,
+        "soft": soft,
+        "matcher": parts,
+        "fuzzy": fuzzy_index_data(tech),
+        # Skill IDs: position of each technical skill in taxonomy order
+        "skill_ids": [s for s, c in parts["category"].items() if c != "soft"],
+    }
+
+def save_artifact(artifact, path=ARTIFACT_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+def load_artifact(version, path=ARTIFACT_PATH):
+    try:
+        with open(path, "rb") as f:
+            artifact = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if artifact.get("format") != ARTIFACT_FORMAT or artifact.get("version") != version:
+        return None
+    return artifact
+
+def load_taxonomy(path=None, artifact_path=None):
+    path = path or TAXONOMY_PATH
+    artifact_path = artifact_path or ARTIFACT_PATH
+
+    with open(path, "rb") as f:
+        mtime = os.fstat(f.fileno()).st_mtime
+        raw = f.read()
+    version = taxonomy_version(raw)
+
+    artifact = load_artifact(version, artifact_path)
+    if artifact is None:
+        artifact = compile_taxonomy(json.loads(raw), version)
+        try:
+            save_artifact(artifact, artifact_path)
+        except OSError as e:
+            print(f"Could not write skill matcher artifact: {e}", file=sys.stderr)
+
+    skill_ids = artifact["skill_ids"]
+    return {
+        "version": version,
+        "path": path,
+        "mtime": mtime,
+        "tech": artifact["tech"],
+        "soft": artifact["soft"],
+        "matcher": compile_matcher(artifact["matcher"]),
+        "skill_ids": skill_ids,
+        "skill_id": {skill: i for i, skill in enumerate(skill_ids)},
+        "fuzzy": load_fuzzy_index(artifact["fuzzy"]) if FUZZY_ENABLED else None,
+    }
+
+# ---------------------------------------------------
+# HOT RELOAD
+# ---------------------------------------------------
+# Workers call current_taxonomy() per parse. The file is stat'ed at most
+# every RELOAD_S seconds; a changed file is loaded and swapped in whole,
+# so a parse never sees a half-updated matcher.
+_current = None
+_checked_at = 0.0
+_reload_lock = threading.Lock()
+
+def current_taxonomy():
+    global _current, _checked_at
+
+    taxonomy = _current
+    if taxonomy is not None and (
+        RELOAD_S <= 0 or time.monotonic() - _checked_at < RELOAD_S
+    ):
+        return taxonomy
+
+    with _reload_lock:
+        if _current is not None and time.monotonic() - _checked_at < RELOAD_S:
+            return _current
+        _checked_at = time.monotonic()
+
+        try:
+            if _current is None or os.path.getmtime(TAXONOMY_PATH) != _current["mtime"]:
+                _current = load_taxonomy()
+        except (OSError, ValueError, KeyError) as e:
+            # Half-written or broken file: keep serving the last good one
+            if _current is None:
+                raise
+            print(f"Skill taxonomy reload failed: {e}", file=sys.stderr)
+        return _current
+
+# ---------------------------------------------------
+# CLI
+# ---------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the skill taxonomy")
+    parser.add_argument("taxonomy", nargs="?", default=TAXONOMY_PATH)
+    parser.add_argument("--out", default=ARTIFACT_PATH, help="artifact path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with open(args.taxonomy, "rb") as f:
+        raw = f.read()
+    artifact = compile_taxonomy(json.loads(raw), taxonomy_version(raw))
+    save_artifact(artifact, args.out)
+    compiled_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    load_taxonomy(args.taxonomy, args.out)
+    loaded_ms = (time.perf_counter() - start) * 1000
+
+    print(
+        f"{len(artifact['matcher']['category'])} skills, "
+        f"{len(artifact['matcher']['owners'])} patterns -> {args.out} "
+        f"(version {artifact['version']}, compiled in {compiled_ms:.1f} ms, "
+        f"loads in {loaded_ms:.1f} ms)",
+        file=sys.stderr,
+    )
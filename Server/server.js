@@ -8,7 +8,7 @@ import dotenv from "dotenv";
 
 import connectDB from "./config/db.js";
 import authRoutes from "./routes/authRoutes.js";
-import parseResume from "./utils/parseResume.js";
+import parseResume, { startParserPool, parserMetrics, matchJobs } from "./utils/parseResume.js";
 import profileRoutes from "./routes/profileRoutes.js";
 
 dotenv.config();
@@ -26,6 +26,9 @@ app.use(express.json());
 // Connect DB
 connectDB();
 
+// Warm Python parser workers
+startParserPool();
+
 // Routes
 app.use("/api/user", authRoutes);
 app.use("/api/profile", profileRoutes);
@@ -40,62 +43,171 @@ const uploadsDir = path.join(__dirname, "uploads");
 import fs from "fs";
 if (!fs.existsSync(uploadsDir)) fs.mkdirSync(uploadsDir);
 
+// UPLOAD_STORAGE=memory (default): the PDF stays in memory and is handed
+// to the parser as bytes, no write/re-read on the uploads volume.
+// UPLOAD_STORAGE=disk keeps a copy under /uploads as before.
+// UPLOAD_MAX_MB=10 caps what one request can hold in memory (memory
+// storage only; disk uploads stay uncapped as before).
+const UPLOAD_TO_DISK = process.env.UPLOAD_STORAGE === "disk";
+const UPLOAD_MAX_BYTES = (Number(process.env.UPLOAD_MAX_MB) || 10) * 1024 * 1024;
+
 // Multer Storage
-const storage = multer.diskStorage({
-  destination: (_, __, cb) => cb(null, uploadsDir),
-  filename: (_, file, cb) => {
-    const unique = `${Date.now()}-${Math.round(Math.random() * 1e9)}`;
-    cb(null, `${unique}-${file.originalname}`);
-  },
+const storage = UPLOAD_TO_DISK
+  ? multer.diskStorage({
+      destination: (_, __, cb) => cb(null, uploadsDir),
+      filename: (_, file, cb) => {
+        const unique = `${Date.now()}-${Math.round(Math.random() * 1e9)}`;
+        cb(null, `${unique}-${file.originalname}`);
+      },
+    })
+  : multer.memoryStorage();
+const upload = multer({
+  storage,
+  limits: UPLOAD_TO_DISK ? {} : { fileSize: UPLOAD_MAX_BYTES },
 });
-const upload = multer({ storage });
+
+// Multer errors (e.g. over the size cap) as JSON, like the route's own
+// errors, instead of Express's default HTML 500
+const uploadResume = (req, res, next) =>
+  upload.single("resume")(req, res, (err) => {
+    if (err instanceof multer.MulterError) {
+      const status = err.code === "LIMIT_FILE_SIZE" ? 413 : 400;
+      return res.status(status).json({ message: err.message, code: err.code });
+    }
+    next(err);
+  });
+
+// What the parser reads: the saved file, or the in-memory buffer
+const uploadSource = (file) =>
+  file.buffer
+    ? [file.buffer, { name: file.originalname }]
+    : [path.join(uploadsDir, file.filename), {}];
+
+// Public link to the stored copy (none for memory uploads)
+const uploadLink = (file) => (file.filename ? `/uploads/${file.filename}` : null);
+
+// ------------------------------
+// Parsed Result Shaping
+// ------------------------------
+// Convert skills object → array
+const toSkillsArray = (skills) =>
+  skills
+    ? Object.entries(skills).map(([n, relevance]) => ({
+        name: n.charAt(0).toUpperCase() + n.slice(1),
+        relevance,
+      }))
+    : [];
+
+const toParsedData = (parsed, filename) => ({
+  file: parsed.file || filename,
+  resumeText: parsed.resumeText || "",
+  name: parsed.name || null,
+  email: parsed.email || null,
+  phone: parsed.phone || null,
+  skills: toSkillsArray(parsed.skills),
+  education: parsed.education || [],
+  experience_years: parsed.experience_years || 0,
+  projects: parsed.projects || [],
+  summary: parsed.summary || "",
+  ats_score: parsed.ats_score || 0,
+  job_match: parsed.job_match || { matched_skills: [], missing_skills: [] },
+  // Pages past the parser's PDF_MAX_PAGES / PDF_MAX_CHARS budget were skipped
+  truncated: Boolean(parsed.truncated),
+});
+
+// ------------------------------
+// Streamed Upload (Server-Sent Events)
+// ------------------------------
+// Sent when the client asks for text/event-stream. Events:
+//   contact / rules / enriching  partial results from the parser
+//   done                         same body as the JSON response
+//   error                        { message }
+async function streamUpload(req, res) {
+  res.writeHead(200, {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    Connection: "keep-alive",
+    "X-Accel-Buffering": "no",
+  });
+  res.flushHeaders();
+
+  const sendEvent = (event, data) => {
+    if (res.writableEnded || res.destroyed) return;
+    res.write(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`);
+  };
+
+  const [source, options] = uploadSource(req.file);
+  const parsed = await parseResume(source, "", {
+    ...options,
+    onEvent: (event, data) =>
+      sendEvent(event, data.skills ? { ...data, skills: toSkillsArray(data.skills) } : data),
+  });
+
+  if (!parsed) {
+    sendEvent("error", { message: "Parsing failed" });
+  } else {
+    sendEvent("done", {
+      message: "Uploaded & parsed successfully",
+      filePath: uploadLink(req.file),
+      parsedData: toParsedData(parsed, req.file.filename || req.file.originalname),
+    });
+  }
+  res.end();
+}
 
 // ------------------------------
 // Upload Route
 // ------------------------------
-app.post("/api/upload", upload.single("resume"), async (req, res) => {
+app.post("/api/upload", uploadResume, async (req, res) => {
   try {
     if (!req.file) return res.status(400).json({ message: "No file uploaded" });
 
-    const filePath = path.join(uploadsDir, req.file.filename);
+    if (req.accepts(["json", "text/event-stream"]) === "text/event-stream") {
+      return await streamUpload(req, res);
+    }
 
     // Parse via Python utility
-    const parsed = await parseResume(filePath);
+    const [source, options] = uploadSource(req.file);
+    const parsed = await parseResume(source, "", options);
 
     if (!parsed) {
       return res.status(500).json({ message: "Parsing failed" });
     }
 
-    // Convert skills object → array
-    const skillsArray = parsed.skills
-      ? Object.entries(parsed.skills).map(([n, relevance]) => ({
-          name: n.charAt(0).toUpperCase() + n.slice(1),
-          relevance,
-        }))
-      : [];
-
-    const finalData = {
-      file: parsed.file || req.file.filename,
-      resumeText: parsed.resumeText || "",
-      name: parsed.name || null,
-      email: parsed.email || null,
-      phone: parsed.phone || null,
-      skills: skillsArray,
-      education: parsed.education || [],
-      experience_years: parsed.experience_years || 0,
-      projects: parsed.projects || [],
-      summary: parsed.summary || "",
-      ats_score: parsed.ats_score || 0,
-      job_match: parsed.job_match || { matched_skills: [], missing_skills: [] },
-    };
-
     return res.json({
       message: "Uploaded & parsed successfully",
-      filePath: `/uploads/${req.file.filename}`,
-      parsedData: finalData,
+      filePath: uploadLink(req.file),
+      parsedData: toParsedData(parsed, req.file.filename || req.file.originalname),
     });
   } catch (err) {
     console.error("UPLOAD ERROR:", err);
+    if (res.headersSent) return res.end();
+    return res.status(500).json({ message: "Server error", detail: String(err) });
+  }
+});
+
+// ------------------------------
+// Job Matching (precomputed job skill index)
+// ------------------------------
+// Body: { skills: ["python", ...] or [{ name, relevance }, ...], top? }
+app.post("/api/jobs/match", async (req, res) => {
+  const skills = (req.body?.skills || [])
+    .map((s) => (typeof s === "string" ? s : s?.name))
+    .filter(Boolean);
+  if (!skills.length) return res.status(400).json({ message: "No skills given" });
+
+  const matches = await matchJobs(skills, Number(req.body.top) || null);
+  if (!matches) return res.status(500).json({ message: "Job matching failed" });
+  return res.json({ matches });
+});
+
+// ------------------------------
+// Parser Metrics (queue depth, LLM wait times)
+// ------------------------------
+app.get("/api/parser/metrics", async (req, res) => {
+  try {
+    return res.json(await parserMetrics());
+  } catch (err) {
     return res.status(500).json({ message: "Server error", detail: String(err) });
   }
 });
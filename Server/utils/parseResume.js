@@ -1,26 +1,220 @@
-import { execFile } from "child_process";
+import { spawn } from "child_process";
+import readline from "readline";
 import path from "path";
 import { fileURLToPath } from "url";
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
-export default function parseResume(filePath) {
+const scriptPath = path.join(__dirname, "../python/parse_resume.py");
+
+// ------------------------------
+// Pool Config
+// ------------------------------
+const PYTHON_BIN = process.env.PYTHON_BIN || "python";
+const POOL_SIZE = Number(process.env.PARSER_WORKERS) || 2;
+// Concurrent jobs per worker; their LLM fallbacks are micro-batched together
+const JOBS_PER_WORKER = Number(process.env.PARSER_WORKER_JOBS) || 4;
+// Ollama's OLLAMA_NUM_PARALLEL is split between the workers (at least one
+// slot each, so a pool larger than it still makes the server queue)
+const OLLAMA_PARALLEL = Number(process.env.OLLAMA_NUM_PARALLEL) || 1;
+const LLM_SLOTS_PER_WORKER = Math.max(1, Math.floor(OLLAMA_PARALLEL / POOL_SIZE));
+// Only when set on purpose: the defaults (1 slot, 2 workers) always trip it
+if (process.env.OLLAMA_NUM_PARALLEL && OLLAMA_PARALLEL < POOL_SIZE) {
+  console.warn(
+    `PARSER_WORKERS (${POOL_SIZE}) exceeds OLLAMA_NUM_PARALLEL (${OLLAMA_PARALLEL}): ` +
+      "LLM fallbacks will queue on the Ollama server"
+  );
+}
+// Must cover the 120 s Ollama fallback plus the parse itself
+const JOB_TIMEOUT_MS = Number(process.env.PARSER_TIMEOUT_MS) || 180000;
+const RESPAWN_DELAY_MS = 1000;
+
+const workers = [];
+const queue = [];
+let nextJobId = 1;
+
+// ------------------------------
+// Worker Lifecycle
+// ------------------------------
+function startWorker() {
+  const proc = spawn(
+    PYTHON_BIN,
+    [scriptPath, "--serve", "--threads", String(JOBS_PER_WORKER)],
+    {
+      stdio: ["pipe", "pipe", "pipe"],
+      env: { ...process.env, OLLAMA_SLOTS: String(LLM_SLOTS_PER_WORKER) },
+    }
+  );
+  // jobs: in flight; abandoned: timed out but still holding a Python thread
+  const worker = { proc, ready: false, jobs: new Map(), abandoned: new Set() };
+  workers.push(worker);
+
+  readline
+    .createInterface({ input: proc.stdout })
+    .on("line", (line) => handleMessage(worker, line));
+
+  proc.stderr.on("data", (d) => console.error("Python Error:", d.toString()));
+
+  proc.on("error", (err) => console.error("Parser worker failed:", err));
+  // A dead worker is handled by the exit handler below
+  proc.stdin.on("error", () => {});
+
+  proc.on("exit", (code) => {
+    workers.splice(workers.indexOf(worker), 1);
+    for (const id of [...worker.jobs.keys()]) finishJob(worker, id, null);
+
+    // Back off when the worker died before loading (missing python / model)
+    const delay = worker.ready ? 0 : RESPAWN_DELAY_MS;
+    console.error(`Parser worker exited (code ${code}), respawning`);
+    setTimeout(() => {
+      ensurePool();
+      dispatch();
+    }, delay);
+  });
+}
+
+function ensurePool() {
+  while (workers.length < POOL_SIZE) startWorker();
+}
+
+function busy(worker) {
+  return worker.jobs.size + worker.abandoned.size;
+}
+
+function handleMessage(worker, line) {
+  let msg;
+  try {
+    msg = JSON.parse(line);
+  } catch (e) {
+    console.error("Invalid JSON from python:", line);
+    return;
+  }
+
+  if (msg.ready) {
+    worker.ready = true;
+    return dispatch();
+  }
+
+  // Partial result of a streamed job; the final reply follows later
+  if (msg.event) {
+    worker.jobs.get(msg.id)?.onEvent?.(msg.event, msg.data);
+    return;
+  }
+
+  worker.abandoned.delete(msg.id);
+  if (worker.jobs.has(msg.id)) {
+    if (!msg.ok) console.error("Python Error:", msg.error);
+    finishJob(worker, msg.id, msg.ok ? msg.result : null);
+  }
+  dispatch();
+}
+
+function finishJob(worker, id, result) {
+  const job = worker.jobs.get(id);
+  if (!job) return;
+
+  clearTimeout(job.timer);
+  worker.jobs.delete(id);
+  job.resolve(result);
+}
+
+function send(worker, job, payload) {
+  worker.jobs.set(job.id, job);
+  job.timer = setTimeout(() => {
+    console.error("Parser timeout:", job.file || payload.op);
+    finishJob(worker, job.id, null);
+    worker.abandoned.add(job.id);
+
+    // Every thread is stuck on timed-out jobs: recycle the process
+    if (worker.abandoned.size >= JOBS_PER_WORKER) worker.proc.kill("SIGKILL");
+  }, JOB_TIMEOUT_MS);
+
+  worker.proc.stdin.write(JSON.stringify({ id: job.id, ...payload }) + "\n");
+}
+
+// ------------------------------
+// Job Scheduling
+// ------------------------------
+function dispatch() {
+  for (const worker of workers) {
+    while (queue.length && worker.ready && busy(worker) < JOBS_PER_WORKER) {
+      const job = queue.shift();
+      send(
+        worker,
+        job,
+        job.payload || {
+          // Buffers go inline (base64), so the upload never touches disk
+          ...(job.data
+            ? { name: job.file, data: job.data.toString("base64") }
+            : { file: job.file }),
+          job_description: job.jobDescription,
+          priority: job.priority,
+          stream: Boolean(job.onEvent),
+        }
+      );
+    }
+  }
+}
+
+// Warm the workers at boot so the first upload skips the spaCy load
+export function startParserPool() {
+  ensurePool();
+}
+
+// LLM scheduler queue depth / wait times and PDF timings, per worker
+export async function parserMetrics() {
+  const perWorker = await Promise.all(
+    workers
+      .filter((w) => w.ready)
+      .map(
+        (worker) =>
+          new Promise((resolve) =>
+            send(worker, { id: nextJobId++, resolve }, { op: "metrics" })
+          )
+      )
+  );
+
+  return {
+    queued: queue.length,
+    workers: workers.length,
+    inFlight: workers.reduce((n, w) => n + busy(w), 0),
+    perWorker,
+  };
+}
+
+// Resume skills scored against every job in the precomputed job index
+// (job_index.py): [{ index, id, title, company, ats_score,
+// matched_skills, missing_skills }], best first; null on failure
+export function matchJobs(skills, top = null) {
+  return new Promise((resolve) => {
+    ensurePool();
+    queue.push({ id: nextJobId++, payload: { op: "match_jobs", skills, top }, resolve });
+    dispatch();
+  });
+}
+
+// source: path of the PDF, or its contents as a Buffer (name then labels it)
+// priority: "interactive" (uploads) or "bulk" (imports)
+// onEvent(event, data): partial results ("contact", "rules", "enriching")
+// before the promise resolves with the full result
+export default function parseResume(
+  source,
+  jobDescription = "",
+  { priority = "interactive", onEvent = null, name = "upload.pdf" } = {}
+) {
+  const isBuffer = Buffer.isBuffer(source);
   return new Promise((resolve) => {
-    const scriptPath = path.join(__dirname, "../python/parse_resume.py");
-
-    execFile("python", [scriptPath, filePath], (err, stdout, stderr) => {
-      if (err || stderr) {
-        console.error("Python Error:", stderr || err);
-        return resolve(null);
-      }
-
-      try {
-        return resolve(JSON.parse(stdout));
-      } catch (e) {
-        console.error("Invalid JSON from python:", stdout);
-        return resolve(null);
-      }
+    ensurePool();
+    queue.push({
+      id: nextJobId++,
+      file: isBuffer ? name : source,
+      data: isBuffer ? source : null,
+      jobDescription,
+      priority,
+      onEvent,
+      resolve,
     });
+    dispatch();
   });
 }